@@ -6,6 +6,7 @@
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from PySide6.QtCore import QObject, Signal, QThread, QTimer
 from PySide6.QtWidgets import QApplication
@@ -23,6 +24,8 @@ class DiskAnalyzer(QObject):
         super().__init__(parent)
         self.max_depth = 3  # 最大分析深度
         self.min_size_threshold = 1024 * 1024  # 1MB以下のフォルダは「その他」にまとめる
+        # 直下のフォルダを並列に走査するスレッド数（stat 待ちの間は GIL が解放される）
+        self.max_workers = min(32, (os.cpu_count() or 1) * 4)
         self._progress_total = 0
         self._progress_processed = 0
     
@@ -71,85 +74,162 @@ class DiskAnalyzer(QObject):
             self.error_occurred.emit(f"分析中にエラーが発生しました: {str(e)}")
     
     def _analyze_folder_recursive(self, folder_path, current_depth):
-        """フォルダを再帰的に分析"""
+        """フォルダを再帰的に分析
+        
+        直下の各フォルダはスレッドプールで並列に走査し、完了した順に進捗を通知する。
+        シグナルの発行は呼び出し元のスレッドだけで行う。
+        """
         if current_depth > self.max_depth:
             return []
         
+        try:
+            # フォルダ内のアイテムを取得（scandir なら種類の判定に追加の stat が要らない）
+            try:
+                with os.scandir(folder_path) as it:
+                    entries = list(it)
+            except PermissionError:
+                # アクセス権限がない場合はスキップ
+                return []
+            
+            # 元の並び順を保つため、結果はインデックスの位置に入れる
+            results = [None] * len(entries)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {}
+                for index, entry in enumerate(entries):
+                    try:
+                        if entry.is_dir():
+                            future = pool.submit(self._analyze_subfolder, entry.path, current_depth + 1)
+                            futures[future] = (index, entry)
+                        elif entry.is_file():
+                            results[index] = self._file_item(entry, entry.stat().st_size, current_depth + 1)
+                            self._increment_progress()
+                    except (OSError, PermissionError):
+                        # アクセスできないファイル/フォルダはスキップ
+                        continue
+                
+                for future in as_completed(futures):
+                    index, entry = futures[future]
+                    folder_size, children, item_count = future.result()
+                    results[index] = self._folder_item(entry, folder_size, current_depth + 1, children)
+                    # サブツリー内のアイテムとフォルダ自身の分だけ進める
+                    self._increment_progress(item_count + 1)
+            
+            return [item for item in results if item is not None]
+            
+        except Exception as e:
+            print(f"フォルダ分析エラー ({folder_path}): {e}")
+            return []
+    
+    def _analyze_subfolder(self, folder_path, depth):
+        """depth の階層にあるフォルダを分析し、(合計サイズ, 子アイテム, アイテム数) を返す"""
+        if depth > self.max_depth:
+            # 表示する深さを超えた部分はサイズだけを求める
+            return self._calculate_folder_size(folder_path), [], 0
+        return self._analyze_folder(folder_path, depth)
+    
+    def _analyze_folder(self, folder_path, current_depth):
+        """フォルダを1回だけ走査し、(合計サイズ, 子アイテムのリスト, 一覧に載せたアイテム数) を返す
+        
+        子フォルダのサイズは再帰呼び出しの結果を積み上げるので、同じファイルを何度も stat しない。
+        合計サイズは os.walk と同じく、リンク先のフォルダを含めない。
+        インスタンスの状態を書き換えないので、複数のスレッドから同時に呼び出せる。
+        """
         try:
             folder_info_list = []
+            total_size = 0
+            item_count = 0
             
-            # フォルダ内のアイテムを取得
-            items = []
             try:
-                for item in os.listdir(folder_path):
-                    item_path = os.path.join(folder_path, item)
-                    if os.path.exists(item_path):
-                        items.append(item_path)
+                with os.scandir(folder_path) as it:
+                    entries = list(it)
             except PermissionError:
                 # アクセス権限がない場合はスキップ
-                return []
+                return 0, [], 0
             
             # 各アイテムのサイズを計算
-            for item_path in items:
+            for entry in entries:
                 try:
-                    if os.path.isdir(item_path):
+                    if entry.is_dir():
                         # フォルダの場合
-                        folder_size = self._calculate_folder_size(item_path)
-                        folder_name = os.path.basename(item_path)
-                        
-                        folder_info = {
-                            'name': folder_name,
-                            'path': item_path,
-                            'size': folder_size,
-                            'type': 'folder',
-                            'depth': current_depth + 1,
-                            'children': self._analyze_folder_recursive(item_path, current_depth + 1) if current_depth < self.max_depth else []
-                        }
-                        folder_info_list.append(folder_info)
-                        self._increment_progress()
+                        folder_size, children, child_count = self._analyze_subfolder(entry.path, current_depth + 1)
+                        if not entry.is_symlink():
+                            total_size += folder_size
+                        folder_info_list.append(
+                            self._folder_item(entry, folder_size, current_depth + 1, children)
+                        )
+                        item_count += child_count + 1
                     
-                    elif os.path.isfile(item_path):
-                        # ファイルの場合
-                        file_size = os.path.getsize(item_path)
-                        file_name = os.path.basename(item_path)
+                    else:
+                        # シンボリックリンクはリンク先のサイズ（リンク切れは OSError でスキップ）
+                        file_size = entry.stat().st_size
+                        total_size += file_size
+                        if not entry.is_file():
+                            # FIFO などはサイズだけ合計に含め、一覧には出さない
+                            continue
                         
-                        file_info = {
-                            'name': file_name,
-                            'path': item_path,
-                            'size': file_size,
-                            'type': 'file',
-                            'depth': current_depth + 1,
-                            'children': []
-                        }
-                        folder_info_list.append(file_info)
-                        self._increment_progress()
+                        # ファイルの場合
+                        folder_info_list.append(self._file_item(entry, file_size, current_depth + 1))
+                        item_count += 1
                 
                 except (OSError, PermissionError):
                     # アクセスできないファイル/フォルダはスキップ
                     continue
             
-            return folder_info_list
+            return total_size, folder_info_list, item_count
             
         except Exception as e:
             print(f"フォルダ分析エラー ({folder_path}): {e}")
-            return []
+            return 0, [], 0
+    
+    @staticmethod
+    def _folder_item(entry, size, depth, children):
+        """フォルダ1件分の分析結果"""
+        return {
+            'name': entry.name,
+            'path': entry.path,
+            'size': size,
+            'type': 'folder',
+            'depth': depth,
+            'children': children
+        }
+    
+    @staticmethod
+    def _file_item(entry, size, depth):
+        """ファイル1件分の分析結果"""
+        return {
+            'name': entry.name,
+            'path': entry.path,
+            'size': size,
+            'type': 'file',
+            'depth': depth,
+            'children': []
+        }
     
     def _calculate_folder_size(self, folder_path):
         """フォルダのサイズを計算"""
-        total_size = 0
-        try:
-            for dirpath, dirnames, filenames in os.walk(folder_path):
-                for filename in filenames:
-                    try:
-                        file_path = os.path.join(dirpath, filename)
-                        if os.path.exists(file_path):
-                            total_size += os.path.getsize(file_path)
-                    except (OSError, PermissionError):
-                        continue
-        except (OSError, PermissionError):
-            pass
-        
-        return total_size
+        return sum(self._iter_sizes(folder_path))
+    
+    @staticmethod
+    def _iter_sizes(folder_path):
+        """フォルダ以下のファイルサイズを順に返す（os.walk と同じくリンク先のフォルダには入らない）"""
+        pending = [folder_path]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except (OSError, PermissionError):
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            pending.append(entry.path)
+                    else:
+                        # シンボリックリンクはリンク先のサイズ（リンク切れは OSError でスキップ）
+                        yield entry.stat().st_size
+                except (OSError, PermissionError):
+                    continue
     
     def get_drive_info(self, drive_path):
         """ドライブ情報を取得"""
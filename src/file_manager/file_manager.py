@@ -591,8 +591,8 @@ class LeftPaneWidget(QWidget):
         # プログレスバーを表示
         self.show_progress(f"ドライブ {drive} を読み込み中...")
         
-        # QTimerを使用して非同期風に処理
-        QTimer.singleShot(100, lambda: self.load_drive_sync(drive_path))
+        # QTimerを使用して非同期風に処理（ウィジェットが破棄されたらタイマーも取り消される）
+        QTimer.singleShot(100, self, lambda: self.load_drive_sync(drive_path))
     
     def load_drive_sync(self, drive_path):
         """同期でドライブを読み込み"""
@@ -1161,8 +1161,8 @@ class FileManagerWidget(QWidget):
         # プログレスバーを表示
         self.show_right_progress(f"フォルダを読み込み中: {os.path.basename(path)}")
         
-        # QTimerを使用して非同期風に処理
-        QTimer.singleShot(100, lambda: self.load_path_sync(path))
+        # QTimerを使用して非同期風に処理（ウィジェットが破棄されたらタイマーも取り消される）
+        QTimer.singleShot(100, self, lambda: self.load_path_sync(path))
     
     def load_path_sync(self, path):
         """同期でパスを読み込み"""
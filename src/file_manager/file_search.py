@@ -21,6 +21,15 @@ class FileSearchIndex(QObject):
     progress_updated = Signal(int)  # 騾ｲ謐暦ｼ・-100・・
     error_occurred = Signal(str)  # 繧ｨ繝ｩ繝ｼ繝｡繝・そ繝ｼ繧ｸ
     
+    # Extra PRAGMA statements run on every connection (e.g. "synchronous=OFF")
+    connection_pragmas = ()
+    
+    _INSERT_FILE_SQL = '''
+        INSERT OR REPLACE INTO files 
+        (path, name, size, modified_time, is_directory, extension, indexed_time, directory, content_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
     def __init__(self, index_db_path=None, parent=None):
         super().__init__(parent)
         if index_db_path is None:
@@ -29,10 +38,17 @@ class FileSearchIndex(QObject):
         self.index_db_path = index_db_path
         self.init_database()
     
+    def _connect(self):
+        """Open a connection to the index and apply ``connection_pragmas``."""
+        conn = sqlite3.connect(self.index_db_path)
+        for pragma in self.connection_pragmas:
+            conn.execute(f"PRAGMA {pragma}")
+        return conn
+    
     def init_database(self):
         """Ensure the index database and schema exist."""
         try:
-            conn = sqlite3.connect(self.index_db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # 繝輔ぃ繧､繝ｫ諠・ｱ繝・・繝悶Ν
@@ -77,27 +93,28 @@ class FileSearchIndex(QObject):
         except Exception as e:
             self.error_occurred.emit(f"繝・・繧ｿ繝吶・繧ｹ蛻晄悄蛹悶お繝ｩ繝ｼ: {str(e)}")
     
+    @staticmethod
+    def _index_row(file_path, file_info, indexed_time):
+        """Build the parameter tuple for ``_INSERT_FILE_SQL``."""
+        return (
+            file_path,
+            file_info['name'],
+            file_info['size'],
+            file_info['modified_time'],
+            file_info['is_directory'],
+            file_info['extension'],
+            indexed_time,
+            file_info['directory'],
+            file_info.get('content_hash')
+        )
+    
     def add_file_to_index(self, file_path, file_info):
         """Insert or update a single entry in the index."""
         try:
-            conn = sqlite3.connect(self.index_db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO files 
-                (path, name, size, modified_time, is_directory, extension, indexed_time, directory, content_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                file_path,
-                file_info['name'],
-                file_info['size'],
-                file_info['modified_time'],
-                file_info['is_directory'],
-                file_info['extension'],
-                time.time(),
-                file_info['directory'],
-                file_info.get('content_hash')
-            ))
+            cursor.execute(self._INSERT_FILE_SQL, self._index_row(file_path, file_info, time.time()))
             
             conn.commit()
             conn.close()
@@ -108,7 +125,7 @@ class FileSearchIndex(QObject):
     def remove_file_from_index(self, file_path):
         """Delete an entry from the index database."""
         try:
-            conn = sqlite3.connect(self.index_db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute('DELETE FROM files WHERE path = ?', (file_path,))
@@ -122,7 +139,7 @@ class FileSearchIndex(QObject):
     def search_files(self, query, search_type="name", limit=100, scope_path=None):
         """Run a search query against the SQLite index."""
         try:
-            conn = sqlite3.connect(self.index_db_path)
+            conn = self._connect()
             cursor = conn.cursor()
 
             safe_limit = max(1, int(limit))
@@ -259,19 +276,27 @@ class FileSearchIndex(QObject):
                 return
             
             # 繝輔ぃ繧､繝ｫ繧偵う繝ｳ繝・ャ繧ｯ繧ｹ縺ｫ霑ｽ蜉
-            indexed_count = 0
+            # Collect rows first and write them in a single transaction
+            rows = []
+            indexed_time = time.time()
             for i, file_path in enumerate(all_files):
                 file_info = self.get_file_info(file_path)
                 if file_info:
-                    self.add_file_to_index(file_path, file_info)
-                    indexed_count += 1
+                    rows.append(self._index_row(file_path, file_info, indexed_time))
                 
                 # 騾ｲ謐玲峩譁ｰ
                 progress = int((i / len(all_files)) * 100)
                 self.progress_updated.emit(progress)
             
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.executemany(self._INSERT_FILE_SQL, rows)
+            finally:
+                conn.close()
+            
             self.progress_updated.emit(100)
-            self.index_updated.emit(indexed_count)
+            self.index_updated.emit(len(rows))
             
         except Exception as e:
             self.error_occurred.emit(f"繧､繝ｳ繝・ャ繧ｯ繧ｹ譖ｴ譁ｰ繧ｨ繝ｩ繝ｼ: {str(e)}")
@@ -279,7 +304,7 @@ class FileSearchIndex(QObject):
     def get_index_stats(self):
         """Return summary statistics about the index contents."""
         try:
-            conn = sqlite3.connect(self.index_db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # 邱上ヵ繧｡繧､繝ｫ謨ｰ
@@ -6,11 +6,15 @@ from __future__ import annotations
 
 import os
 import re
+from collections import Counter
 from dataclasses import dataclass
 from difflib import SequenceMatcher
+from functools import lru_cache
 from pathlib import Path
 from typing import Callable, List, Optional, Sequence
 
+import numpy as np
+
 ProgressCallback = Optional[Callable[[int], None]]
 StopCallback = Optional[Callable[[], bool]]
 
@@ -30,8 +34,15 @@ DEFAULT_VIDEO_EXTENSIONS: Sequence[str] = (
     ".m2ts",
 )
 
+# normalize_filename で使う正規表現（呼び出しごとのパターン検索を避ける）
+_SEPARATOR_RE = re.compile(r'[-_\s]+')
+_PAREN_RE = re.compile(r'\([^)]*\)')
+_BRACKET_RE = re.compile(r'\[[^\]]*\]')
+_UNDERSCORES_RE = re.compile(r'_+')
+_DIGITS_RE = re.compile(r'\d+')
+
 
-@dataclass
+@dataclass(slots=True)
 class SimilarFileGroup:
     """ファイル名の類似度に基づくグループ情報"""
 
@@ -61,6 +72,7 @@ class SimilarFileGroup:
         return variance ** 0.5  # 標準偏差を返す
 
 
+@lru_cache(maxsize=8192)
 def normalize_filename(filename: str) -> str:
     """
     ファイル名を正規化して比較しやすくする
@@ -77,14 +89,14 @@ def normalize_filename(filename: str) -> str:
 
     # よくあるパターンの正規化
     # 例: "video_01", "video_1", "video-1" などを統一
-    normalized = re.sub(r'[-_\s]+', '_', normalized)
+    normalized = _SEPARATOR_RE.sub('_', normalized)
 
     # 括弧内の情報を除去（コピーなどの表記）
-    normalized = re.sub(r'\([^)]*\)', '', normalized)
-    normalized = re.sub(r'\[[^\]]*\]', '', normalized)
+    normalized = _PAREN_RE.sub('', normalized)
+    normalized = _BRACKET_RE.sub('', normalized)
 
     # 連続するアンダースコアを1つに
-    normalized = re.sub(r'_+', '_', normalized)
+    normalized = _UNDERSCORES_RE.sub('_', normalized)
 
     # 前後の空白・アンダースコアを削除
     normalized = normalized.strip('_').strip()
@@ -98,9 +110,11 @@ def calculate_similarity(name1: str, name2: str) -> float:
 
     SequenceMatcherを使用して編集距離ベースの類似度を計算
     """
-    norm1 = normalize_filename(name1)
-    norm2 = normalize_filename(name2)
+    return _normalized_similarity(normalize_filename(name1), normalize_filename(name2))
+
 
+def _normalized_similarity(norm1: str, norm2: str) -> float:
+    """正規化済みのファイル名同士の類似度（0.0-1.0）"""
     if not norm1 or not norm2:
         return 0.0
 
@@ -167,21 +181,26 @@ def extract_number_pattern(filename: str) -> tuple[str, list[int]]:
     normalized = normalize_filename(name_without_ext)
 
     # 数字を抽出
-    numbers = [int(n) for n in re.findall(r'\d+', normalized)]
+    numbers = [int(n) for n in _DIGITS_RE.findall(normalized)]
 
     # 数字部分をプレースホルダーに置き換えてパターンを作成
-    pattern = re.sub(r'\d+', '#', normalized)
+    pattern = _DIGITS_RE.sub('#', normalized)
 
     return pattern, numbers
 
 
+def _has_video_extension(path: Path, extensions: Sequence[str] | None = None) -> bool:
+    """拡張子だけで動画かどうかを判定（ファイルシステムには触れない）"""
+    suffix = path.suffix.lower()
+    target_exts = tuple(e.lower() for e in (extensions or DEFAULT_VIDEO_EXTENSIONS))
+    return suffix in target_exts
+
+
 def is_video_file(path: Path, extensions: Sequence[str] | None = None) -> bool:
     """動画拡張子かどうかを判定"""
     if not path.is_file():
         return False
-    suffix = path.suffix.lower()
-    target_exts = tuple(e.lower() for e in (extensions or DEFAULT_VIDEO_EXTENSIONS))
-    return suffix in target_exts
+    return _has_video_extension(path, extensions)
 
 
 def find_similar_filenames(
@@ -255,12 +274,6 @@ def find_similar_filenames(
     if progress_callback:
         progress_callback(10)
 
-    # パターンベースの初期グルーピング
-    pattern_groups: dict[str, List[Path]] = {}
-    for file_path in files:
-        pattern, numbers = extract_number_pattern(file_path.name)
-        pattern_groups.setdefault(pattern, []).append(file_path)
-
     if progress_callback:
         progress_callback(30)
 
@@ -272,83 +285,118 @@ def find_similar_filenames(
         except OSError:
             file_sizes[str(file_path)] = 0
 
+    # 正規化済みファイル名とサイズはファイルごとに1回だけ求めておく
+    paths = [str(file_path) for file_path in files]
+    normalized_names = [normalize_filename(file_path.name) for file_path in files]
+    sizes = [file_sizes.get(path, 0) for path in paths]
+    name_weight = 1.0 - size_weight
+
+    # 行ごとの上限値計算用（SequenceMatcher.ratio() は 2*min(len)/合計長 を超えない）
+    name_lengths = np.array([len(name) for name in normalized_names], dtype=np.float64)
+    size_array = np.array(sizes, dtype=np.float64)
+
+    def candidate_indices(a: int) -> np.ndarray:
+        """a より後ろのファイルのうち、しきい値に届く可能性のあるもののインデックス"""
+        others = slice(a + 1, None)
+        lengths = name_lengths[others]
+        total_length = lengths + name_lengths[a]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            name_bound = np.where(
+                total_length > 0,
+                2.0 * np.minimum(lengths, name_lengths[a]) / total_length,
+                0.0,
+            )
+            if use_file_size:
+                larger = np.maximum(size_array[others], size_array[a])
+                smaller = np.minimum(size_array[others], size_array[a])
+                size_sim = np.where(larger > 0, smaller / larger, 1.0)
+                bound = name_bound * name_weight + size_sim * size_weight
+            else:
+                bound = name_bound
+        # 浮動小数点の丸めで取りこぼさないよう少しだけ余裕を持たせる
+        return np.flatnonzero(bound >= similarity_threshold - 1e-9) + a + 1
+
+    # 文字の出現回数（SequenceMatcher.quick_ratio() と同じ上限値をペアごとに安く求める）
+    name_counters = [Counter(name) for name in normalized_names]
+
+    def may_reach_threshold(a: int, b: int) -> bool:
+        """文字の共通数による上限値でもしきい値に届かないペアを除外"""
+        total_length = len(normalized_names[a]) + len(normalized_names[b])
+        if not normalized_names[a] or not normalized_names[b]:
+            name_bound = 0.0
+        else:
+            common = sum((name_counters[a] & name_counters[b]).values())
+            name_bound = 2.0 * common / total_length
+        if use_file_size:
+            size_sim = calculate_size_similarity(sizes[a], sizes[b])
+            bound = name_bound * name_weight + size_sim * size_weight
+        else:
+            bound = name_bound
+        return bound >= similarity_threshold - 1e-9
+
+    def pair_similarity(a: int, b: int) -> float:
+        """インデックスで指定した2ファイルの類似度"""
+        name_sim = _normalized_similarity(normalized_names[a], normalized_names[b])
+        if not use_file_size:
+            return name_sim
+        size_sim = calculate_size_similarity(sizes[a], sizes[b])
+        return name_sim * name_weight + size_sim * size_weight
+
     # 類似度ベースのグルーピング
     similar_groups: List[SimilarFileGroup] = []
-    processed_files: set[str] = set()
+    processed = [False] * len(files)
     total_files = len(files)
     current_progress = 30
 
-    for i, file1 in enumerate(files):
+    for i in range(total_files):
         if stop_callback and stop_callback():
             return similar_groups
 
-        file1_str = str(file1)
-        if file1_str in processed_files:
+        if processed[i]:
             continue
 
         # このファイルと類似しているファイルを探す
-        similar_files = [file1_str]
-        similar_file_sizes = {file1_str: file_sizes.get(file1_str, 0)}
+        members = [i]
+        member_scores: List[float] = []  # 先頭ファイルとの類似度（平均計算で再利用）
 
-        for file2 in files[i + 1:]:
-            file2_str = str(file2)
-            if file2_str in processed_files:
+        for j in candidate_indices(i).tolist():
+            if processed[j] or not may_reach_threshold(i, j):
                 continue
 
-            # 類似度を計算
-            if use_file_size:
-                similarity = calculate_combined_similarity(
-                    file1.name,
-                    file2.name,
-                    file_sizes.get(file1_str, 0),
-                    file_sizes.get(file2_str, 0),
-                    name_weight=1.0 - size_weight,
-                    size_weight=size_weight,
-                )
-            else:
-                similarity = calculate_similarity(file1.name, file2.name)
-
+            similarity = pair_similarity(i, j)
             if similarity >= similarity_threshold:
-                similar_files.append(file2_str)
-                similar_file_sizes[file2_str] = file_sizes.get(file2_str, 0)
-                processed_files.add(file2_str)
+                members.append(j)
+                member_scores.append(similarity)
+                processed[j] = True
 
         # 最小グループサイズ以上の場合のみグループとして追加
-        if len(similar_files) >= min_group_size:
+        if len(members) >= min_group_size:
             # グループ内の平均類似度を計算
             total_similarity = 0.0
             comparison_count = 0
 
-            for j, f1 in enumerate(similar_files):
-                for f2 in similar_files[j + 1:]:
-                    if use_file_size:
-                        sim = calculate_combined_similarity(
-                            Path(f1).name,
-                            Path(f2).name,
-                            file_sizes.get(f1, 0),
-                            file_sizes.get(f2, 0),
-                            name_weight=1.0 - size_weight,
-                            size_weight=size_weight,
-                        )
-                    else:
-                        sim = calculate_similarity(Path(f1).name, Path(f2).name)
-                    total_similarity += sim
+            for similarity in member_scores:
+                total_similarity += similarity
+                comparison_count += 1
+            for k, a in enumerate(members[1:], start=1):
+                for b in members[k + 1:]:
+                    total_similarity += pair_similarity(a, b)
                     comparison_count += 1
 
             avg_similarity = total_similarity / comparison_count if comparison_count > 0 else 1.0
 
             # 代表ファイル名は最初のファイル
-            representative_name = Path(similar_files[0]).name
+            representative_name = files[i].name
 
             similar_groups.append(
                 SimilarFileGroup(
                     representative_name=representative_name,
-                    files=similar_files,
+                    files=[paths[m] for m in members],
                     similarity_score=avg_similarity,
-                    file_sizes=similar_file_sizes,
+                    file_sizes={paths[m]: sizes[m] for m in members},
                 )
             )
-            processed_files.add(file1_str)
+            processed[i] = True
 
         # 進捗更新
         current_progress = 30 + int((i / total_files) * 70)
@@ -401,23 +401,27 @@ class FilenameSimilarityDialog(QDialog):
         count = len(self.checked_files)
         self.selection_label.setText(f"チェック済み: {count} ファイル")
 
+    def _set_all_check_states(self, state: Qt.CheckState) -> None:
+        """すべてのファイルアイテムのチェック状態をまとめて変更"""
+        # 1件ごとに行の再描画が走らないよう、変更が終わるまで更新を止める
+        self.tree.setUpdatesEnabled(False)
+        try:
+            iterator = QTreeWidgetItemIterator(self.tree)
+            while iterator.value():
+                item = iterator.value()
+                if item.data(0, Qt.UserRole):  # ファイルアイテムのみ
+                    item.setCheckState(0, state)
+                iterator += 1
+        finally:
+            self.tree.setUpdatesEnabled(True)
+
     def _select_all(self) -> None:
         """すべてのファイルを選択"""
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            if item.data(0, Qt.UserRole):  # ファイルアイテムのみ
-                item.setCheckState(0, Qt.Checked)
-            iterator += 1
+        self._set_all_check_states(Qt.Checked)
 
     def _deselect_all(self) -> None:
         """すべてのファイルの選択を解除"""
-        iterator = QTreeWidgetItemIterator(self.tree)
-        while iterator.value():
-            item = iterator.value()
-            if item.data(0, Qt.UserRole):  # ファイルアイテムのみ
-                item.setCheckState(0, Qt.Unchecked)
-            iterator += 1
+        self._set_all_check_states(Qt.Unchecked)
 
     def _delete_checked_files(self) -> None:
         """チェックされたファイルを削除"""
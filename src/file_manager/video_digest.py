@@ -4,16 +4,28 @@
 動画ファイルのダイジェスト生成機能
 """
 
+import functools
+import hashlib
 import os
+import shutil
 import sys
+import tempfile
+import threading
+import zipfile
 from pathlib import Path
 from typing import List, Optional, Tuple
 
-from PySide6.QtCore import QObject, Signal, QThread, QTimer
-from PySide6.QtGui import QImage, QPainter, QPixmap
+from PySide6.QtCore import QObject, QRunnable, Qt, Signal, QStandardPaths, QThread, QTimer
+from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import QApplication
 
-from .video_features import VideoFeatures, extract_video_features
+from .video_features import (
+    VideoFeatures,
+    extract_video_features,
+    frame_indices_for,
+    read_frames_at,
+    video_capture,
+)
 
 # OpenCVとNumPyのインポート
 try:
@@ -25,12 +37,105 @@ except ImportError:
     cv2 = None
     np = None
 
+# サムネイルはQPixmapと同じ32bpp（Format_RGB32）の不透明な画像なので、
+# Qtのフォーマット変換と透過判定を省略する
+THUMBNAIL_FORMAT = QImage.Format_RGB32
+PIXMAP_CONVERSION_FLAGS = Qt.NoFormatConversion | Qt.NoOpaqueDetection
+
+
+def to_pixmap(image):
+    """ワーカーから受け取ったサムネイル画像をGUIスレッドでQPixmapに変換する
+
+    QPixmapはGUIスレッド以外で扱えないため、生成側はスレッド安全なQImageを発行し、
+    表示する側がこの関数で変換します（QPixmapが渡された場合はそのまま返す）。
+    """
+    if isinstance(image, QPixmap):
+        return image
+    return QPixmap.fromImage(image, PIXMAP_CONVERSION_FLAGS)
+
+
+# サムネイルが1枚の場合に使う位置（動画全体に対する割合）
+SINGLE_THUMBNAIL_POSITION = 0.1
+
+# ダイジェストキャッシュ全体の上限サイズ（超えると最後に使われたのが古いものから削除）
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# キャッシュディレクトリ内で特徴量を保存するファイル名
+CACHE_FEATURES_FILE = "features.npz"
+
+
+def composite_letterbox(dst, src, x, y, background=255):
+    """srcをdstの(x, y)に配置し、残りの余白を背景色で塗りつぶす
+
+    余白の塗りつぶしとタイルのコピーで各画素に一度だけ書き込みます。
+    """
+    h, w = src.shape[:2]
+    dst[:y] = background
+    dst[y + h:] = background
+    dst[y:y + h, :x] = background
+    dst[y:y + h, x + w:] = background
+    dst[y:y + h, x:x + w] = src
+    return dst
+
+
+def _save_features(path: Path, features: VideoFeatures) -> None:
+    """特徴量を pickle を使わない npz 形式で保存する"""
+    arrays = {
+        "path": np.array(features.path),
+        "thumbnail_positions": np.asarray(features.thumbnail_positions, dtype=np.float64),
+        "frame_histograms": features.frame_histograms,
+        "frame_features": features.frame_features,
+        "average_color": features.average_color,
+        "duration": np.float64(features.duration),
+        "resolution": np.asarray(features.resolution, dtype=np.int64),
+        "fps": np.float64(features.fps),
+        "file_size": np.int64(features.file_size),
+        "features_normalized": np.bool_(features.features_normalized),
+    }
+    if features.feature_scales is not None:
+        arrays["feature_scales"] = features.feature_scales
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def _load_features(path: Path) -> Optional[VideoFeatures]:
+    """_save_features で保存した特徴量を読み込む（存在しない・壊れている場合はNone）"""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return VideoFeatures(
+                path=str(data["path"]),
+                thumbnail_positions=data["thumbnail_positions"].tolist(),
+                frame_histograms=data["frame_histograms"],
+                frame_features=data["frame_features"],
+                average_color=data["average_color"],
+                duration=float(data["duration"]),
+                resolution=tuple(int(v) for v in data["resolution"]),
+                fps=float(data["fps"]),
+                file_size=int(data["file_size"]),
+                features_normalized=bool(data["features_normalized"]),
+                feature_scales=data["feature_scales"] if "feature_scales" in data.files else None,
+            )
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return None
+
+
+def _directory_size(path: str) -> int:
+    """ディレクトリ直下のファイルサイズの合計"""
+    total = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
 
 class VideoDigestGenerator(QObject):
     """動画ダイジェスト生成クラス"""
     
     # シグナル定義
-    digest_generated = Signal(str, list)  # ファイルパス, サムネイル画像のリスト
+    # サムネイルはワーカースレッドでも安全に扱えるQImageで発行する（表示側で to_pixmap を使う）
+    digest_generated = Signal(str, list)  # ファイルパス, サムネイル画像(QImage)のリスト
+    thumbnail_ready = Signal(str, int, QImage)  # ファイルパス, サムネイル番号, サムネイル画像
     progress_updated = Signal(int)  # 進捗（0-100）
     error_occurred = Signal(str)  # エラーメッセージ
     
@@ -39,6 +144,8 @@ class VideoDigestGenerator(QObject):
         self.video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.3gp', '.mpg', '.mpeg'}
         self.max_thumbnails = 6  # デフォルトのサムネイル数
         self.thumbnail_size = (160, 90)  # デフォルトのサムネイルサイズ
+        self.cache_enabled = True  # 生成済みサムネイルをディスクにキャッシュする
+        self.cache_max_bytes = CACHE_MAX_BYTES  # キャッシュ全体の上限サイズ
         
     def is_video_file(self, file_path):
         """動画ファイルかどうかを判定"""
@@ -47,6 +154,109 @@ class VideoDigestGenerator(QObject):
         
         file_ext = Path(file_path).suffix.lower()
         return file_ext in self.video_extensions
+
+    def _throttled_progress(self, min_step: int = 2):
+        """前回から min_step 以上進んだ場合（または100%）だけ進捗を発行するコールバックを返す"""
+        last = [-min_step]
+
+        def emit(progress: int) -> None:
+            progress = min(int(progress), 100)
+            if progress - last[0] >= min_step or (progress == 100 and last[0] != 100):
+                last[0] = progress
+                self.progress_updated.emit(progress)
+
+        return emit
+
+    def _cache_root(self) -> Optional[Path]:
+        """サムネイルキャッシュのルートディレクトリを取得"""
+        location = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        if not location:
+            return None
+        return Path(location) / "video_digest"
+
+    def _cache_dir(self, video_path, max_thumbnails, thumbnail_size) -> Optional[Path]:
+        """動画パス・更新日時・サイズ・サムネイル設定からキャッシュディレクトリを決定"""
+        if not self.cache_enabled:
+            return None
+        root = self._cache_root()
+        if root is None:
+            return None
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return None
+        source = f"{video_path}|{stat.st_mtime}|{stat.st_size}|{tuple(thumbnail_size)}|{max_thumbnails}"
+        key = hashlib.blake2b(source.encode("utf-8")).hexdigest()[:16]
+        return root / key
+
+    def _load_cached_digest(self, cache_dir: Optional[Path]) -> Optional[Tuple[List[QImage], VideoFeatures]]:
+        """キャッシュ済みのサムネイルと特徴量を読み込む（存在しない・壊れている場合はNone）"""
+        if cache_dir is None or not cache_dir.is_dir():
+            return None
+        files = sorted(cache_dir.glob("*.png"), key=lambda p: int(p.stem) if p.stem.isdigit() else -1)
+        if not files:
+            return None
+        features = _load_features(cache_dir / CACHE_FEATURES_FILE)
+        if features is None:
+            return None
+        thumbnails = []
+        for file in files:
+            image = QImage()
+            if not image.load(str(file)):
+                return None
+            thumbnails.append(image)
+        # 最終使用日時として更新日時を記録し、容量超過時は古いものから削除する
+        try:
+            os.utime(cache_dir)
+        except OSError:
+            pass
+        return thumbnails, features
+
+    def _save_cached_digest(self, cache_dir: Optional[Path], thumbnails: List[QImage], features: VideoFeatures) -> None:
+        """生成したサムネイル（PNGで劣化なし）と特徴量をキャッシュに保存"""
+        if cache_dir is None or not thumbnails:
+            return
+        # 書き込み途中のキャッシュを読まないよう一時ディレクトリに書いてから置き換える。
+        # 同じ動画を複数のスレッドが同時に保存しても衝突しないよう、一時ディレクトリは毎回一意に作る
+        try:
+            cache_dir.parent.mkdir(parents=True, exist_ok=True)
+            tmp_dir = Path(tempfile.mkdtemp(prefix=f"{cache_dir.name}.", suffix=".tmp", dir=cache_dir.parent))
+        except OSError:
+            return
+        try:
+            for i, image in enumerate(thumbnails):
+                if not image.save(str(tmp_dir / f"{i}.png"), "PNG"):
+                    raise OSError(f"サムネイルを保存できませんでした: {i}.png")
+            _save_features(tmp_dir / CACHE_FEATURES_FILE, features)
+            os.replace(tmp_dir, cache_dir)
+        except OSError:
+            return
+        finally:
+            if tmp_dir.exists():
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        self._prune_cache(cache_dir.parent)
+
+    def _prune_cache(self, root: Path) -> None:
+        """キャッシュの合計サイズが cache_max_bytes を超えたら、最後に使われたのが古いものから削除する"""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    # 他のスレッドが書き込み中の一時ディレクトリは対象外
+                    if entry.name.endswith(".tmp") or not entry.is_dir(follow_symlinks=False):
+                        continue
+                    size = _directory_size(entry.path)
+                    entries.append((entry.stat(follow_symlinks=False).st_mtime, size, entry.path))
+                    total += size
+        except OSError:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.cache_max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
     
     def generate_digest(self, video_path, max_thumbnails=None, thumbnail_size=None) -> Optional[VideoFeatures]:
         """動画のダイジェストを生成
@@ -55,6 +265,10 @@ class VideoDigestGenerator(QObject):
         生成して `digest_generated` を発行するフォールバックを提供します。
         これにより、UIはサムネイルがなくても正常に動作します。
 
+        生成済みのサムネイルと特徴量は (パス, 更新日時, ファイルサイズ, サムネイル設定) を
+        キーにディスクへキャッシュされ、同じ動画を再度開いた場合はデコードを省略します。
+        サムネイルはPNGで保存するため、キャッシュから読んでも画質は変わりません。
+
         Returns:
             Optional[VideoFeatures]: 動画の特徴量情報。OpenCVが利用できない場合はNone。
         """
@@ -69,13 +283,14 @@ class VideoDigestGenerator(QObject):
             try:
                 thumbnails = []
                 for i in range(max_thumbnails):
-                    pixmap = QPixmap(thumbnail_size[0], thumbnail_size[1])
-                    pixmap.fill()  # 空の（透明/白）pixmap
-                    thumbnails.append(pixmap)
+                    image = QImage(thumbnail_size[0], thumbnail_size[1], THUMBNAIL_FORMAT)
+                    image.fill(Qt.white)  # 空の（白）画像
+                    thumbnails.append(image)
 
-                # 進捗を段階的に更新
+                # 進捗を段階的に更新（同じ値は重複して発行しない）
+                emit_progress = self._throttled_progress(min_step=1)
                 for p in range(0, 101, max(1, 100 // max(1, max_thumbnails))):
-                    self.progress_updated.emit(min(p, 100))
+                    emit_progress(p)
 
                 # 最後にdigest_generatedを発行
                 self.digest_generated.emit(video_path, thumbnails)
@@ -97,65 +312,42 @@ class VideoDigestGenerator(QObject):
             max_thumbnails = self.max_thumbnails
         if thumbnail_size is None:
             thumbnail_size = self.thumbnail_size
+
+        # キャッシュ済みであればデコードせずに発行
+        cache_dir = self._cache_dir(video_path, max_thumbnails, thumbnail_size)
+        cached = self._load_cached_digest(cache_dir)
+        if cached:
+            thumbnails, features = cached
+            self.progress_updated.emit(100)
+            self.digest_generated.emit(video_path, thumbnails)
+            return features
             
-        # 特徴量抽出
+        # 特徴量抽出とサムネイル生成で同じキャプチャを共有する
         try:
-            features = extract_video_features(
-                video_path,
-                max_thumbnails=max_thumbnails,
-                progress_callback=lambda p: self.progress_updated.emit(p)
-            )
-            if not features:
-                self.error_occurred.emit(f"動画の特徴量抽出に失敗しました: {video_path}")
-                return None
-                
-            # サムネイル画像の生成
-            thumbnails = []
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                self.error_occurred.emit(f"動画ファイルを開けませんでした: {video_path}")
-                return None
-                
-            try:
-                for pos in features.thumbnail_positions:
-                    frame_pos = int(pos * features.frame_count)
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                    ret, frame = cap.read()
-                    if not ret:
-                        continue
-                        
-                    # フレームをリサイズ
-                    aspect_ratio = frame.shape[1] / frame.shape[0]
-                    w = thumbnail_size[0]
-                    h = int(w / aspect_ratio)
-                    if h > thumbnail_size[1]:
-                        h = thumbnail_size[1]
-                        w = int(h * aspect_ratio)
-                    frame = cv2.resize(frame, (w, h))
-                    
-                    # BGR -> RGB変換
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    
-                    # QPixmapに変換
-                    qimg = QImage(frame.data, frame.shape[1], frame.shape[0],
-                                frame.strides[0], QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(qimg)
-                    
-                    # 中央寄せでリサイズ
-                    if w != thumbnail_size[0] or h != thumbnail_size[1]:
-                        bg = QPixmap(thumbnail_size[0], thumbnail_size[1])
-                        bg.fill()
-                        x = (thumbnail_size[0] - w) // 2
-                        y = (thumbnail_size[1] - h) // 2
-                        painter = QPainter(bg)
-                        painter.drawPixmap(x, y, pixmap)
-                        painter.end()
-                        pixmap = bg
-                        
-                    thumbnails.append(pixmap)
-                    
-            finally:
-                cap.release()
+            with video_capture(video_path) as cap:
+                if not cap.isOpened():
+                    self.error_occurred.emit(f"動画ファイルを開けませんでした: {video_path}")
+                    return None
+
+                if max_thumbnails == 1:
+                    # 1枚だけの場合は特徴量抽出を省き、先頭付近のフレームだけをデコードする
+                    features = self._single_thumbnail_features(cap, video_path)
+                else:
+                    features = extract_video_features(
+                        video_path,
+                        max_thumbnails=max_thumbnails,
+                        progress_callback=self._throttled_progress(),
+                        capture=cap,
+                    )
+                if not features:
+                    self.error_occurred.emit(f"動画の特徴量抽出に失敗しました: {video_path}")
+                    return None
+
+                # サムネイル画像の生成
+                frame_indices = frame_indices_for(features.thumbnail_positions, features.frame_count)
+                thumbnails = self._render_thumbnails(cap, frame_indices, thumbnail_size, video_path)
+
+            self._save_cached_digest(cache_dir, thumbnails, features)
                 
             # サムネイル生成が完了したらシグナルを発行
             self.digest_generated.emit(video_path, thumbnails)
@@ -164,68 +356,66 @@ class VideoDigestGenerator(QObject):
         except Exception as e:
             self.error_occurred.emit(f"サムネイル生成に失敗しました: {e}")
             return None
-            
-            # 動画の情報を取得
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            duration = total_frames / fps if fps > 0 else 0
-            
-            if total_frames == 0:
-                self.error_occurred.emit("動画にフレームが含まれていません")
-                cap.release()
-                return
-            
-            # サムネイルを生成するフレーム位置を計算
-            frame_positions = []
-            if max_thumbnails == 1:
-                # 1つの場合は中央のフレーム
-                frame_positions = [total_frames // 2]
-            else:
-                # 複数の場合は等間隔で配置
-                step = total_frames // (max_thumbnails + 1)
-                frame_positions = [step * (i + 1) for i in range(max_thumbnails)]
-            
-            thumbnails = []
-            for i, frame_pos in enumerate(frame_positions):
-                # 進捗を更新
-                progress = int((i / len(frame_positions)) * 100)
-                self.progress_updated.emit(progress)
-                
-                # 指定されたフレームに移動
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                ret, frame = cap.read()
+
+    def _single_thumbnail_features(self, cap, video_path) -> Optional[VideoFeatures]:
+        """1枚サムネイル用に、フレームをデコードせず基本情報だけの特徴量を作成"""
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = float(cap.get(cv2.CAP_PROP_FPS))
+        if total_frames <= 0 or fps <= 0:
+            return None
+        return VideoFeatures(
+            path=str(video_path),
+            thumbnail_positions=[SINGLE_THUMBNAIL_POSITION],
+            frame_histograms=[],
+            frame_features=[],
+            average_color=np.zeros(3, dtype=np.float32),
+            duration=total_frames / fps,
+            resolution=(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))),
+            fps=fps,
+            file_size=os.path.getsize(video_path),
+        )
+
+    def _render_thumbnails(self, cap, frame_indices, thumbnail_size, video_path) -> List[QImage]:
+        """指定フレームを読み出し、レターボックス付きのサムネイルを作成
+
+        1枚できるごとに `thumbnail_ready` を発行し、UIが逐次表示できるようにします。
+        """
+        tiles = {}
+        # レターボックス用のキャンバスとタイルバッファはフレーム間で使い回す。
+        # キャンバスはQPixmapと同じ32bppのBGRX配列（リトルエンディアンのFormat_RGB32）にして、
+        # GUIスレッドでの24bpp→32bppの変換コピーを省く。X（4バイト目）は255のまま変えない
+        canvas = np.empty((thumbnail_size[1], thumbnail_size[0], 4), dtype=np.uint8)
+        canvas[..., 3] = 255
+        canvas_bgr = canvas[..., :3]
+        canvas_image = QImage(canvas.data, canvas.shape[1], canvas.shape[0],
+                              canvas.strides[0], THUMBNAIL_FORMAT)
+        resized = None
+        # フレームはすぐ縮小してキャンバスへ写すので、デコード先の配列を使い回せる
+        for i, frame in read_frames_at(cap, frame_indices, reuse_buffer=True):
+            if frame is None:
+                continue
                 
-                if ret:
-                    # フレームをリサイズ
-                    resized_frame = cv2.resize(frame, thumbnail_size)
-                    
-                    # OpenCVのBGRからRGBに変換
-                    rgb_frame = cv2.cvtColor(resized_frame, cv2.COLOR_BGR2RGB)
-                    
-                    # QImageに変換
-                    h, w, ch = rgb_frame.shape
-                    bytes_per_line = ch * w
-                    qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                    
-                    # QPixmapに変換
-                    pixmap = QPixmap.fromImage(qt_image)
-                    thumbnails.append(pixmap)
-                else:
-                    # フレームの読み込みに失敗した場合は空のQPixmapを追加
-                    empty_pixmap = QPixmap(thumbnail_size[0], thumbnail_size[1])
-                    empty_pixmap.fill()
-                    thumbnails.append(empty_pixmap)
-            
-            cap.release()
-            
-            # 進捗を100%に設定
-            self.progress_updated.emit(100)
+            # フレームをリサイズ
+            aspect_ratio = frame.shape[1] / frame.shape[0]
+            w = thumbnail_size[0]
+            h = int(w / aspect_ratio)
+            if h > thumbnail_size[1]:
+                h = thumbnail_size[1]
+                w = int(h * aspect_ratio)
+            if resized is None or resized.shape[:2] != (h, w):
+                resized = np.empty((h, w, 3), dtype=np.uint8)
+            cv2.resize(frame, (w, h), dst=resized)
             
-            # ダイジェスト生成完了を通知
-            self.digest_generated.emit(video_path, thumbnails)
+            # 中央寄せで余白を塗りつぶしながらキャンバスへ配置
+            x = (thumbnail_size[0] - w) // 2
+            y = (thumbnail_size[1] - h) // 2
+            composite_letterbox(canvas_bgr, resized, x, y)
             
-        except Exception as e:
-            self.error_occurred.emit(f"ダイジェスト生成中にエラーが発生しました: {str(e)}")
+            # キャンバスは次のフレームで上書きされるため、切り離したコピーを渡す
+            tiles[i] = canvas_image.copy()
+            self.thumbnail_ready.emit(video_path, i, tiles[i])
+        # フレーム番号順に読み出したので、指定された並びに戻す
+        return [tiles[i] for i in sorted(tiles)]
     
     def get_video_info(self, video_path):
         """動画の基本情報を取得"""
@@ -236,20 +426,18 @@ class VideoDigestGenerator(QObject):
             return None
         
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                return None
-            
-            # 動画の情報を取得
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            with video_capture(video_path) as cap:
+                if not cap.isOpened():
+                    return None
+                
+                # 動画の情報を取得
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             
             duration = total_frames / fps if fps > 0 else 0
             
-            cap.release()
-            
             return {
                 'duration': duration,
                 'fps': fps,
@@ -262,6 +450,18 @@ class VideoDigestGenerator(QObject):
             return None
 
 
+_thread_local = threading.local()
+
+
+def _thread_generator() -> VideoDigestGenerator:
+    """現在のスレッド専用のVideoDigestGeneratorを取得（なければ作成）"""
+    generator = getattr(_thread_local, "generator", None)
+    if generator is None:
+        generator = VideoDigestGenerator()
+        _thread_local.generator = generator
+    return generator
+
+
 class VideoDigestWorker(QThread):
     """動画ダイジェスト生成用のワーカースレッド"""
     
@@ -270,22 +470,112 @@ class VideoDigestWorker(QThread):
         self.video_path = video_path
         self.max_thumbnails = max_thumbnails
         self.thumbnail_size = thumbnail_size
-        self.generator = VideoDigestGenerator()
-        
-        # シグナルを接続
-        self.generator.digest_generated.connect(self.digest_generated)
-        self.generator.progress_updated.connect(self.progress_updated)
-        self.generator.error_occurred.connect(self.error_occurred)
     
     def run(self):
         """スレッドの実行"""
-        self.generator.generate_digest(
-            self.video_path, 
-            self.max_thumbnails, 
-            self.thumbnail_size
+        # ジェネレーターはスレッドごとに1つだけ作成し、実行中だけシグナルを転送する
+        generator = _thread_generator()
+        forwards = (
+            (generator.digest_generated, self.digest_generated),
+            (generator.thumbnail_ready, self.thumbnail_ready),
+            (generator.progress_updated, self.progress_updated),
+            (generator.error_occurred, self.error_occurred),
         )
+        for source, target in forwards:
+            source.connect(target)
+        try:
+            generator.generate_digest(
+                self.video_path, 
+                self.max_thumbnails, 
+                self.thumbnail_size
+            )
+        finally:
+            for source, target in forwards:
+                source.disconnect(target)
     
     # シグナルを転送
     digest_generated = Signal(str, list)
+    thumbnail_ready = Signal(str, int, QImage)
     progress_updated = Signal(int)
     error_occurred = Signal(str)
+
+
+def pack_thumbnails(images: List[QImage]) -> Tuple[bytes, int, int]:
+    """同じサイズのサムネイルを1つの32bppバッファに詰めて (バッファ, 幅, 高さ) を返す
+
+    QImageのリストをシグナルで送ると1枚ずつ変換されるため、
+    スレッド間では1つのバイト列にまとめて渡します。
+    """
+    if not images:
+        return b"", 0, 0
+    width, height = images[0].width(), images[0].height()
+    # 32bppの行は常に4バイト境界に揃うので、行末のパディングは入らない
+    tile_size = width * height * 4
+    buffer = bytearray()
+    for image in images:
+        if image.format() != THUMBNAIL_FORMAT:
+            image = image.convertToFormat(THUMBNAIL_FORMAT)
+        if (image.width(), image.height()) != (width, height):
+            image = image.scaled(width, height)
+        buffer += image.constBits()[:tile_size]
+    return bytes(buffer), width, height
+
+
+def unpack_thumbnails(data: bytes, width: int, height: int) -> List[QImage]:
+    """pack_thumbnails で詰めたバッファをQImageのリストに戻す
+
+    返すQImageは data を直接参照するため、data より長く使う場合はコピーすること。
+    """
+    tile_size = width * height * 4
+    if not tile_size:
+        return []
+    view = memoryview(data)
+    return [
+        QImage(view[offset : offset + tile_size], width, height, width * 4, THUMBNAIL_FORMAT)
+        for offset in range(0, len(data) - tile_size + 1, tile_size)
+    ]
+
+
+class VideoDigestSignals(QObject):
+    """VideoDigestTask の結果をGUIスレッドへ届けるシグナル（先頭の引数は要求ごとのトークン）"""
+
+    # トークン, ファイルパス, pack_thumbnails で詰めたバッファ, 幅, 高さ
+    digest_generated = Signal(int, str, bytes, int, int)
+    thumbnail_ready = Signal(int, str, int, QImage)  # トークン, ファイルパス, サムネイル番号, サムネイル画像
+    progress_updated = Signal(int, int)  # トークン, 進捗(%)
+    error_occurred = Signal(int, str)  # トークン, エラーメッセージ
+
+
+class VideoDigestTask(QRunnable):
+    """QThreadPool で実行するダイジェスト生成タスク
+
+    選択のたびにスレッドを作らず、プールのスレッドを使い回すためのもの。
+    古い要求の結果は、受け取る側がトークンを比較して読み捨てます。
+    """
+
+    def __init__(self, video_path, token, signals, max_thumbnails=6, thumbnail_size=(160, 90)):
+        super().__init__()
+        self.video_path = video_path
+        self.token = token
+        self.signals = signals
+        self.max_thumbnails = max_thumbnails
+        self.thumbnail_size = thumbnail_size
+
+    def run(self):
+        generator = _thread_generator()
+        forwards = (
+            (generator.digest_generated, self._forward_digest),
+            (generator.thumbnail_ready, functools.partial(self.signals.thumbnail_ready.emit, self.token)),
+            (generator.progress_updated, functools.partial(self.signals.progress_updated.emit, self.token)),
+            (generator.error_occurred, functools.partial(self.signals.error_occurred.emit, self.token)),
+        )
+        for source, target in forwards:
+            source.connect(target)
+        try:
+            generator.generate_digest(self.video_path, self.max_thumbnails, self.thumbnail_size)
+        finally:
+            for source, target in forwards:
+                source.disconnect(target)
+
+    def _forward_digest(self, video_path, images):
+        self.signals.digest_generated.emit(self.token, video_path, *pack_thumbnails(images))
@@ -9,13 +9,14 @@ import os
 from pathlib import Path
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QProgressBar, QScrollArea, QWidget, QGridLayout, QFrame,
+    QProgressBar, QFrame, QGraphicsScene, QGraphicsView,
     QMessageBox, QSizePolicy
 )
 from PySide6.QtCore import Qt, QTimer, QSettings
-from PySide6.QtGui import QPixmap, QFont
+from PySide6.QtGui import QBrush, QColor, QPen, QPixmap, QFont
 
-from .video_digest import VideoDigestWorker
+from .video_digest import VideoDigestWorker, to_pixmap
+from .video_thumbnail_preview import find_cached_thumbnails
 
 
 class VideoDigestDialog(QDialog):
@@ -27,6 +28,8 @@ class VideoDigestDialog(QDialog):
         self.video_path = video_path
         self.settings = QSettings("FileManager", "VideoDigest")
         self.worker = None
+        self._pending_progress = None
+        self._streamed_count = 0  # 逐次表示済みのサムネイル数
         
         # 設定値を読み込み
         self.max_thumbnails = self.settings.value("max_thumbnails", 6, type=int)
@@ -93,25 +96,26 @@ class VideoDigestDialog(QDialog):
     
     def create_thumbnail_section(self, parent_layout):
         """サムネイル表示セクションを作成"""
-        # スクロールエリア
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
-        
-        # サムネイルコンテナ
-        self.thumbnail_container = QWidget()
-        self.thumbnail_layout = QGridLayout(self.thumbnail_container)
-        self.thumbnail_layout.setSpacing(10)
-        
-        scroll_area.setWidget(self.thumbnail_container)
-        parent_layout.addWidget(scroll_area)
+        # レイアウト計算を避けるため、サムネイルはシーン上のアイテムとして配置する
+        self.thumbnail_scene = QGraphicsScene(self)
+        self.thumbnail_scene.setBackgroundBrush(QBrush(self.palette().window()))
+        self.thumbnail_view = QGraphicsView(self.thumbnail_scene)
+        self.thumbnail_view.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.thumbnail_view.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.thumbnail_view.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        parent_layout.addWidget(self.thumbnail_view)
         
         # 初期メッセージ
-        self.initial_label = QLabel("ダイジェストを生成中...")
-        self.initial_label.setAlignment(Qt.AlignCenter)
-        self.initial_label.setStyleSheet("color: gray; font-size: 14px;")
-        self.thumbnail_layout.addWidget(self.initial_label, 0, 0)
+        self.show_scene_message("ダイジェストを生成中...", "gray")
+    
+    def show_scene_message(self, message, color):
+        """シーンをクリアしてメッセージを表示"""
+        self.thumbnail_scene.clear()
+        self._streamed_count = 0
+        text_item = self.thumbnail_scene.addSimpleText(message, QFont("Arial", 11))
+        text_item.setBrush(QColor(color))
+        self.thumbnail_scene.setSceneRect(self.thumbnail_scene.itemsBoundingRect())
+        return text_item
     
     def create_button_section(self, parent_layout):
         """ボタンセクションを作成"""
@@ -132,8 +136,20 @@ class VideoDigestDialog(QDialog):
         
         parent_layout.addLayout(button_layout)
     
-    def generate_digest(self):
-        """ダイジェストを生成"""
+    def generate_digest(self, use_cache=True):
+        """ダイジェストを生成
+
+        プレビューが同じ動画・同じ設定で生成したサムネイルが QPixmapCache にあれば、
+        ワーカーを起動せずにそれを表示します（use_cache=False なら必ず生成し直す）。
+        """
+        if use_cache:
+            cached = find_cached_thumbnails(self.video_path, self.thumbnail_size, self.max_thumbnails)
+            if cached:
+                self.progress_bar.setVisible(False)
+                self.display_thumbnails(cached)
+                self.regenerate_button.setEnabled(True)
+                return
+        
         # プログレスバーを表示
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
@@ -150,6 +166,7 @@ class VideoDigestDialog(QDialog):
         
         # シグナルを接続
         self.worker.digest_generated.connect(self.on_digest_generated)
+        self.worker.thumbnail_ready.connect(self.on_thumbnail_ready)
         self.worker.progress_updated.connect(self.on_progress_updated)
         self.worker.error_occurred.connect(self.on_error_occurred)
         self.worker.finished.connect(self.on_worker_finished)
@@ -162,32 +179,27 @@ class VideoDigestDialog(QDialog):
         # 既存のサムネイルをクリア
         self.clear_thumbnails()
         
-        # ダイジェストを再生成
-        self.generate_digest()
+        # ダイジェストを再生成（キャッシュは使わない）
+        self.generate_digest(use_cache=False)
     
     def clear_thumbnails(self):
         """サムネイルをクリア"""
-        # レイアウトからすべてのウィジェットを削除
-        while self.thumbnail_layout.count():
-            child = self.thumbnail_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-        
-        # 初期メッセージを表示
-        self.initial_label = QLabel("ダイジェストを生成中...")
-        self.initial_label.setAlignment(Qt.AlignCenter)
-        self.initial_label.setStyleSheet("color: gray; font-size: 14px;")
-        self.thumbnail_layout.addWidget(self.initial_label, 0, 0)
+        # シーンのアイテムをまとめて削除し、初期メッセージを表示
+        self.show_scene_message("ダイジェストを生成中...", "gray")
+    
+    def on_thumbnail_ready(self, video_path, index, thumbnail):
+        """サムネイル1枚の生成完了時の処理（生成済みのものから順に表示）"""
+        if self._streamed_count == 0:
+            self.thumbnail_scene.clear()
+        self.add_thumbnail_item(index, thumbnail)
+        self._streamed_count += 1
+        self.thumbnail_scene.setSceneRect(self.thumbnail_scene.itemsBoundingRect())
     
     def on_digest_generated(self, video_path, thumbnails):
         """ダイジェスト生成完了時の処理"""
-        # 初期メッセージを削除
-        if hasattr(self, 'initial_label') and self.initial_label:
-            self.initial_label.deleteLater()
-            self.initial_label = None
-        
-        # サムネイルを表示
-        self.display_thumbnails(thumbnails)
+        # 逐次表示で揃っていなければ（キャッシュ読み込みや読み飛ばしたフレームがある場合）まとめて表示
+        if not thumbnails or self._streamed_count != len(thumbnails):
+            self.display_thumbnails(thumbnails)
         
         # 再生成ボタンを有効化
         self.regenerate_button.setEnabled(True)
@@ -195,44 +207,49 @@ class VideoDigestDialog(QDialog):
     def display_thumbnails(self, thumbnails):
         """サムネイルを表示"""
         if not thumbnails:
-            no_thumbnails_label = QLabel("サムネイルを生成できませんでした")
-            no_thumbnails_label.setAlignment(Qt.AlignCenter)
-            no_thumbnails_label.setStyleSheet("color: red; font-size: 14px;")
-            self.thumbnail_layout.addWidget(no_thumbnails_label, 0, 0)
+            self.show_scene_message("サムネイルを生成できませんでした", "red")
             return
         
-        # グリッドレイアウトでサムネイルを配置
-        cols = 3  # 1行に3個
+        self.thumbnail_scene.clear()
         for i, thumbnail in enumerate(thumbnails):
-            row = i // cols
-            col = i % cols
-            
-            # サムネイルラベルを作成
-            thumbnail_label = QLabel()
-            thumbnail_label.setPixmap(thumbnail)
-            thumbnail_label.setAlignment(Qt.AlignCenter)
-            thumbnail_label.setStyleSheet("border: 1px solid gray;")
-            thumbnail_label.setScaledContents(True)
-            thumbnail_label.setFixedSize(self.thumbnail_size[0] + 20, self.thumbnail_size[1] + 20)
-            
-            # フレーム番号を表示
-            frame_info = QLabel(f"フレーム {i + 1}")
-            frame_info.setAlignment(Qt.AlignCenter)
-            frame_info.setStyleSheet("font-size: 10px; color: gray;")
-            
-            # サムネイルとフレーム情報を縦に配置
-            thumbnail_widget = QWidget()
-            thumbnail_widget_layout = QVBoxLayout(thumbnail_widget)
-            thumbnail_widget_layout.setContentsMargins(5, 5, 5, 5)
-            thumbnail_widget_layout.setSpacing(5)
-            thumbnail_widget_layout.addWidget(thumbnail_label)
-            thumbnail_widget_layout.addWidget(frame_info)
-            
-            self.thumbnail_layout.addWidget(thumbnail_widget, row, col)
+            self.add_thumbnail_item(i, thumbnail)
+        self._streamed_count = len(thumbnails)
+        
+        self.thumbnail_scene.setSceneRect(self.thumbnail_scene.itemsBoundingRect())
+    
+    def add_thumbnail_item(self, index, thumbnail):
+        """サムネイルと枠線、フレーム番号をグリッド上の位置に配置"""
+        cols = 3  # 1行に3個
+        row = index // cols
+        col = index % cols
+        x = col * (self.thumbnail_size[0] + 20)
+        y = row * (self.thumbnail_size[1] + 30)
+        
+        # サムネイルと枠線（ワーカーからはQImageで届くため、ここでQPixmapに変換）
+        thumbnail = to_pixmap(thumbnail)
+        item = self.thumbnail_scene.addPixmap(thumbnail)
+        item.setPos(x, y)
+        self.thumbnail_scene.addRect(item.sceneBoundingRect(), QPen(Qt.gray))
+        
+        # フレーム番号を表示
+        caption = self.thumbnail_scene.addSimpleText(f"フレーム {index + 1}", QFont("Arial", 8))
+        caption.setBrush(QColor("gray"))
+        caption_x = x + (thumbnail.width() - caption.boundingRect().width()) / 2
+        caption.setPos(caption_x, y + thumbnail.height() + 5)
     
     def on_progress_updated(self, progress):
-        """進捗更新時の処理"""
-        self.progress_bar.setValue(progress)
+        """進捗更新時の処理（連続した更新はイベントループ1周分にまとめて反映）"""
+        scheduled = self._pending_progress is not None
+        self._pending_progress = progress
+        if not scheduled:
+            QTimer.singleShot(0, self, self._apply_pending_progress)
+
+    def _apply_pending_progress(self):
+        """保留中の最新の進捗をプログレスバーに反映"""
+        if self._pending_progress is None:
+            return
+        self.progress_bar.setValue(self._pending_progress)
+        self._pending_progress = None
     
     def on_error_occurred(self, error_message):
         """エラー発生時の処理"""
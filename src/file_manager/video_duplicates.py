@@ -4,11 +4,17 @@
 
 from __future__ import annotations
 
+import bisect
 import hashlib
 import os
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
 
 from .video_features import VideoFeatures
 
@@ -31,6 +37,17 @@ DEFAULT_VIDEO_EXTENSIONS: Sequence[str] = (
     ".m2ts",
 )
 
+_DEFAULT_EXTENSION_SET = frozenset(DEFAULT_VIDEO_EXTENSIONS)
+
+# 事前フィルタ用の指紋で読む先頭・末尾のバイト数
+FINGERPRINT_EDGE = 256 * 1024
+
+# 結合候補の事前判定で許す平均色（BGR各0-255）のユークリッド距離
+MERGE_COLOR_TOLERANCE = 48.0
+
+# 並列ハッシュで一度にスレッドプールへ投入するファイル数（中断の確認間隔を兼ねる）
+HASH_BATCH_SIZE = 32
+
 
 @dataclass
 class DuplicateGroup:
@@ -41,16 +58,20 @@ class DuplicateGroup:
     files: List[str]
     features: Dict[str, Optional[VideoFeatures]] = field(default_factory=dict)
     similarity_threshold: float = 0.95
+    _files_set: Set[str] = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         # 常にパスをソート済みに保つ
         self.files.sort()
+        # 追加時の重複確認用
+        self._files_set = set(self.files)
 
     def add_file_with_features(self, file_path: str, features: Optional[VideoFeatures]) -> None:
         """ファイルを特徴量と共に追加"""
-        if file_path not in self.files:
-            self.files.append(file_path)
-            self.files.sort()
+        if file_path not in self._files_set:
+            self._files_set.add(file_path)
+            # 並べ直さずに挿入位置を二分探索してソート済みを保つ
+            bisect.insort(self.files, file_path)
         self.features[file_path] = features
 
     def is_similar(self, file_path: str, features: Optional[VideoFeatures]) -> bool:
@@ -59,9 +80,14 @@ class DuplicateGroup:
             return False
 
         # すでにグループにある動画との類似度を確認
-        for existing_path, existing_features in self.features.items():
+        # 直近に追加された動画ほど新しい候補と一致しやすいため新しい順に調べる
+        for existing_features in reversed(self.features.values()):
             if not existing_features:
                 continue
+            # similarity_score が0を返す長さの組は計算せずに除外
+            longer = max(features.duration, existing_features.duration, 1.0)
+            if abs(features.duration - existing_features.duration) / longer > 0.1:
+                continue
             
             sim = features.similarity_score(existing_features)
             if sim >= self.similarity_threshold:
@@ -89,33 +115,299 @@ class DuplicateGroup:
         return total_sim / count if count > 0 else 0.0
 
 
-def is_video_file(path: Path, extensions: Sequence[str] | None = None) -> bool:
-    """動画拡張子かどうかを判定"""
-    if not path.is_file():
+def _changed_only(progress_callback: ProgressCallback) -> ProgressCallback:
+    """値が変わったときだけ進捗を通知するコールバックに包む
+
+    ファイルごとに進捗を計算しても、UIスレッドへ送られる通知は最大でも約100回に収まります。
+    """
+    if progress_callback is None:
+        return None
+    last_value: List[Optional[int]] = [None]
+
+    def emit(value: int) -> None:
+        if value != last_value[0]:
+            last_value[0] = value
+            progress_callback(value)
+
+    return emit
+
+
+def _extension_set(extensions: Sequence[str] | frozenset[str] | None) -> frozenset[str]:
+    """拡張子の指定を小文字の frozenset にそろえる（frozenset は小文字化済みとみなす）"""
+    if not extensions:
+        return _DEFAULT_EXTENSION_SET
+    if isinstance(extensions, frozenset):
+        return extensions
+    return frozenset(e.lower() for e in extensions)
+
+
+def is_video_file(path: Path, extensions: Sequence[str] | frozenset[str] | None = None) -> bool:
+    """動画拡張子かどうかを判定
+
+    多数のパスを判定する場合は _extension_set で作った集合を渡すと、呼び出しごとの集合生成を省けます。
+    拡張子が一致したパスだけ is_file で存在を確認します。
+    """
+    if path.suffix.lower() not in _extension_set(extensions):
         return False
-    suffix = path.suffix.lower()
-    target_exts = tuple(e.lower() for e in (extensions or DEFAULT_VIDEO_EXTENSIONS))
-    return suffix in target_exts
+    return path.is_file()
 
 
-def hash_file(path: Path, chunk_size: int = 4 * 1024 * 1024) -> str:
-    """ファイル全体のSHA-256ハッシュを計算"""
-    digest = hashlib.sha256()
-    with path.open("rb") as handle:
+def _groups_are_similar(group1: DuplicateGroup, group2: DuplicateGroup, similarity_threshold: float) -> bool:
+    """2つのグループ間に類似度がしきい値以上の動画の組があるか"""
+    for features1 in group1.features.values():
+        if not features1:
+            continue
+        for features2 in group2.features.values():
+            if features2 and features1.similarity_score(features2) >= similarity_threshold:
+                return True
+    return False
+
+
+def _feature_summary(group: DuplicateGroup) -> Optional[Tuple[float, NDArray[np.float32]]]:
+    """グループ内の特徴量の平均の長さと平均色を返す（特徴量がなければ None）"""
+    features = [f for f in group.features.values() if f]
+    if not features:
+        return None
+    duration = float(np.mean([f.duration for f in features]))
+    return duration, np.mean([f.average_color for f in features], axis=0)
+
+
+def _summaries_may_match(
+    summary1: Optional[Tuple[float, NDArray[np.float32]]],
+    summary2: Optional[Tuple[float, NDArray[np.float32]]],
+) -> bool:
+    """フレーム単位の比較に進む価値があるかを長さと平均色だけで判定する"""
+    if summary1 is None or summary2 is None:
+        return False
+    duration1, color1 = summary1
+    duration2, color2 = summary2
+    # similarity_score は長さの差が10%を超えると0を返す
+    if abs(duration1 - duration2) / max(duration1, duration2, 1.0) > 0.1:
+        return False
+    return float(np.linalg.norm(color1 - color2)) <= MERGE_COLOR_TOLERANCE
+
+
+def _merge_similar_groups(groups: List[DuplicateGroup], similarity_threshold: float) -> List[DuplicateGroup]:
+    """
+    特徴量が似ているグループを Union-Find で連結成分ごとに結合する。
+
+    すでに同じ成分に属するグループの組は比較を省きます。
+    各成分は最も前にあるグループへ他のグループのファイルを追加して返します。
+    """
+    parent = list(range(len(groups)))
+    summaries = [_feature_summary(group) for group in groups]
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]  # 経路を半分に縮める
+            index = parent[index]
+        return index
+
+    for i, group1 in enumerate(groups):
+        for j in range(i + 1, len(groups)):
+            root1, root2 = find(i), find(j)
+            if root1 == root2:
+                continue
+            group2 = groups[j]
+            # サイズの差が大きい場合はスキップ
+            if abs(group1.size - group2.size) / max(group1.size, group2.size) > 0.1:
+                continue
+            # 長さや平均色が大きく異なる組はフレーム単位の比較を省く
+            if not _summaries_may_match(summaries[i], summaries[j]):
+                continue
+            if _groups_are_similar(group1, group2, similarity_threshold):
+                parent[max(root1, root2)] = min(root1, root2)
+
+    merged: Dict[int, DuplicateGroup] = {}
+    for index, group in enumerate(groups):
+        root = find(index)
+        if root == index:
+            merged[root] = group
+            continue
+        target = merged[root]
+        for file_path in group.files:
+            target.add_file_with_features(file_path, group.features.get(file_path))
+    return list(merged.values())
+
+
+def _multi_file_groups(groups: Iterable[DuplicateGroup]) -> List[DuplicateGroup]:
+    """2ファイル以上のグループだけを返す"""
+    return [group for group in groups if len(group.files) > 1]
+
+
+def _advise_sequential(fd: int) -> None:
+    """順次読み込みをカーネルに伝え、先読みを広げてもらう（対応OSのみ）"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except OSError:
+        pass
+
+
+def _walk_videos(
+    root: str | os.PathLike[str], extensions: Set[str] | frozenset[str], recursive: bool = True
+) -> Iterator[Tuple[str, int]]:
+    """
+    os.scandir で動画ファイルを列挙し (パス, サイズ) を返す。
+
+    拡張子で先に絞り込み、DirEntry が保持する stat 結果を使うため、
+    エントリごとの追加の stat 呼び出しや Path の生成を避けられます。
+    ファイルへのシンボリックリンクは含めますが、ディレクトリへのリンクはたどりません。
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                            continue
+                        if os.path.splitext(entry.name)[1].lower() not in extensions:
+                            continue
+                        if not entry.is_file():
+                            continue
+                        size = entry.stat().st_size
+                    except OSError:
+                        continue
+                    yield entry.path, size
+        except OSError:
+            continue
+
+
+def hash_file(path: str | os.PathLike[str], chunk_size: int = 4 * 1024 * 1024) -> str:
+    """ファイル全体のSHA-256ハッシュを計算
+
+    Python 3.11 以降は hashlib.file_digest で読み込みループごとC側に任せます。
+    chunk_size はそれ以前のPythonでのみ使われます。
+    """
+    with open(path, "rb", buffering=0) as handle:
+        _advise_sequential(handle.fileno())
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(handle, "sha256").hexdigest()
+
+        digest = hashlib.sha256()
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
         while True:
-            chunk = handle.read(chunk_size)
-            if not chunk:
+            # 確保済みのバッファへ直接読み込み、チャンクごとの bytes 生成を避ける
+            read = handle.readinto(buffer)
+            if not read:
                 break
-            digest.update(chunk)
+            digest.update(view[:read])
+        return digest.hexdigest()
+
+
+def fingerprint_file(path: str | os.PathLike[str], edge: int = FINGERPRINT_EDGE) -> str:
+    """先頭と末尾 edge バイトずつから計算するSHA-256（重複候補の絞り込み用）
+
+    ファイル全体が 2 * edge バイト以下の場合は全体を読むため、hash_file と同じ値になります。
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size <= 2 * edge:
+            digest.update(handle.read())
+        else:
+            digest.update(handle.read(edge))
+            handle.seek(-edge, os.SEEK_END)
+            digest.update(handle.read(edge))
     return digest.hexdigest()
 
 
-def _to_report_path(path: Path) -> str:
+def _fingerprint_paths(paths: Iterable[str]) -> Dict[str, str]:
+    """各ファイルの指紋を計算する（読めないファイルは含めない）"""
+    fingerprints: Dict[str, str] = {}
+    for path in paths:
+        try:
+            fingerprints[path] = fingerprint_file(path)
+        except OSError:
+            continue
+    return fingerprints
+
+
+def _content_hash(path: str, size: int, fingerprint: str) -> str:
+    """ファイル全体のハッシュを返す（指紋が全体を覆う小さなファイルは読み直さない）"""
+    if size <= 2 * FINGERPRINT_EDGE:
+        return fingerprint
+    return hash_file(path)
+
+
+def _hash_in_parallel(
+    targets: Sequence[Tuple[str, str]], size: int, batch_size: int = HASH_BATCH_SIZE
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    (パス, 指紋) の組をスレッドプールでハッシュし、入力順に (パス, ハッシュ値) を返す。
+
+    hashlib はハッシュ計算中に GIL を解放するため、スレッドでも複数ファイルを並列に処理できます。
+    読み込みに失敗したファイルのハッシュ値は None になります。
+    batch_size 件ずつ投入するので、呼び出し側が途中で反復をやめれば残りは投入されません。
+    その場合も実行中のハッシュ計算の完了は待たずに戻ります。
+    """
+    if not targets:
+        return
+    executor = ThreadPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1))
+    try:
+        for start in range(0, len(targets), batch_size):
+            batch = targets[start:start + batch_size]
+            futures = [executor.submit(_content_hash, path, size, fingerprint) for path, fingerprint in batch]
+            for (path, _), future in zip(batch, futures):
+                try:
+                    yield path, future.result()
+                except OSError:
+                    yield path, None
+    finally:
+        # 中断時に大きなファイルのハッシュ計算を待って停止が遅れないよう、未実行のものは取り消す
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _to_report_path(path: str | os.PathLike[str]) -> str:
     """Return an absolute path string without resolving symlinks when possible."""
     try:
-        return str(path if path.is_absolute() else path.absolute())
+        return os.path.abspath(path)
     except OSError:
-        return str(path)
+        return os.fspath(path)
+
+
+def _submit_feature_extraction(
+    paths: Iterable[str],
+    features_callback: Callable[[str], Optional[VideoFeatures]],
+    stop_callback: StopCallback = None,
+    progress_callback: ProgressCallback = None,
+) -> Optional[Dict[str, Future]]:
+    """
+    特徴量抽出をスレッドプールで並列に実行し、パスごとの Future を返す。
+
+    OpenCV のデコード中は GIL が解放されるため、複数動画のシークとデコードを重ねられます。
+    進捗コールバックには完了した抽出の割合（0-100）が渡されます。
+    中断された場合は未実行の抽出をキャンセルして None を返します。
+    実行待ちのワーカーも開始前に中断を確認するため、走査の終了後にデコードを始めることはありません。
+    例外は Future に保持されるので、呼び出し側で result() を呼んだ時点で送出されます。
+    """
+    targets = list(dict.fromkeys(paths))
+    if not targets:
+        return {}
+
+    def extract(path: str) -> Optional[VideoFeatures]:
+        if stop_callback and stop_callback():
+            return None
+        return features_callback(path)
+
+    executor = ThreadPoolExecutor(max_workers=min(len(targets), os.cpu_count() or 1))
+    try:
+        futures = {path: executor.submit(extract, path) for path in targets}
+        for done, _ in enumerate(as_completed(futures.values()), start=1):
+            if stop_callback and stop_callback():
+                return None
+            if progress_callback:
+                progress_callback(int(done / len(targets) * 100))
+        return futures
+    finally:
+        # 中断時も実行中の抽出の完了を待たずに戻る（未実行のものは取り消す）
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def find_duplicate_videos_with_features(
@@ -150,6 +442,7 @@ def find_duplicate_videos_with_features(
     中断コールバックが真を返した場合は即座に処理を中断します。
     """
     base_dir = Path(base_path)
+    progress_callback = _changed_only(progress_callback)
     if progress_callback:
         progress_callback(0)
 
@@ -164,29 +457,43 @@ def find_duplicate_videos_with_features(
         return []
 
     # ファイル一覧の収集（動画ファイルのみ）
+    video_extensions = _extension_set(extensions)
     video_files = []
-    for path in (base_dir.rglob("*") if recursive else base_dir.iterdir()):
+    for path, size in _walk_videos(base_dir, video_extensions, recursive):
         if stop_callback and stop_callback():
             if progress_callback:
                 progress_callback(100)
             return []
 
-        if not is_video_file(path, extensions):
-            continue
-
-        try:
-            size = path.stat().st_size
-            if size < size_threshold_mb * 1024 * 1024:  # 小さすぎるファイルは除外
-                continue
-            video_files.append((path, size))
-        except OSError:
+        if size < size_threshold_mb * 1024 * 1024:  # 小さすぎるファイルは除外
             continue
+        video_files.append((path, size))
 
     # サイズでグループ化（最初の高速フィルタリング）
-    size_groups: Dict[int, List[Path]] = {}
+    size_groups: Dict[int, List[str]] = {}
     for path, size in video_files:
         size_groups.setdefault(size, []).append(path)
 
+    # 比較対象になるファイルの特徴量をまとめて並列に抽出
+    # 抽出する場合は進捗の前半を抽出、後半を比較に割り当てる
+    feature_futures: Dict[str, Future] = {}
+    progress_offset, progress_span = 0, 100
+    if features_callback:
+        progress_offset, progress_span = 50, 50
+        extracted = _submit_feature_extraction(
+            (_to_report_path(path)
+             for path_list in size_groups.values() if len(path_list) >= 2
+             for path in path_list),
+            features_callback,
+            stop_callback,
+            (lambda value: progress_callback(value * progress_offset // 100)) if progress_callback else None,
+        )
+        if extracted is None:
+            if progress_callback:
+                progress_callback(100)
+            return []
+        feature_futures = extracted
+
     # 結果のグループを格納
     duplicate_groups = []
     total_files = len(video_files)
@@ -199,17 +506,27 @@ def find_duplicate_videos_with_features(
         if len(path_list) < 2:
             continue
 
-        # 同じサイズのファイルはハッシュ値を計算して比較
+        # 先頭と末尾の指紋で絞り込んでから、同じ指紋のファイルだけ全体のハッシュを計算
+        fingerprints = _fingerprint_paths(path_list)
+        fingerprint_counts = Counter(fingerprints.values())
+
         hash_groups: Dict[str, DuplicateGroup] = {}
         for path in path_list:
+            fingerprint = fingerprints.get(path)
+            if fingerprint is None:
+                continue
+            if fingerprint_counts[fingerprint] < 2 and not features_callback:
+                # 内容が一意で類似度による結合もないため結果に含まれない
+                processed_files += 1
+                continue
             try:
-                file_hash = hash_file(path)
+                file_hash = _content_hash(path, file_size, fingerprint)
                 str_path = _to_report_path(path)
 
-                # 特徴量の抽出
+                # 事前に並列抽出した特徴量を取得（抽出時の例外はここで送出される）
                 features = None
-                if features_callback:
-                    features = features_callback(str_path)
+                if str_path in feature_futures:
+                    features = feature_futures[str_path].result()
 
                 # ハッシュ値が同じ場合は同一グループに追加
                 if file_hash in hash_groups:
@@ -227,53 +544,21 @@ def find_duplicate_videos_with_features(
             # 進捗の更新
             processed_files += 1
             if progress_callback:
-                progress = int((processed_files / total_files) * 100)
+                progress = progress_offset + int((processed_files / total_files) * progress_span)
                 progress_callback(min(progress, 100))
 
             if stop_callback and stop_callback():
-                return [g for g in hash_groups.values() if len(g.files) > 1]
+                return _multi_file_groups(hash_groups.values())
 
         # 類似度の高いグループを結合
         if features_callback:
-            groups_to_merge = list(hash_groups.values())
-            i = 0
-            while i < len(groups_to_merge):
-                j = i + 1
-                while j < len(groups_to_merge):
-                    group1 = groups_to_merge[i]
-                    group2 = groups_to_merge[j]
-                    
-                    # サイズの差が大きい場合はスキップ
-                    if abs(group1.size - group2.size) / max(group1.size, group2.size) > 0.1:
-                        j += 1
-                        continue
-                    
-                    # 互いのグループ内の動画の特徴量を比較
-                    merge = False
-                    for file1, features1 in group1.features.items():
-                        for file2, features2 in group2.features.items():
-                            if features1 and features2:
-                                sim = features1.similarity_score(features2)
-                                if sim >= similarity_threshold:
-                                    merge = True
-                                    break
-                        if merge:
-                            break
-                            
-                    if merge:
-                        # グループを結合
-                        for file_path, features in group2.features.items():
-                            group1.add_file_with_features(file_path, features)
-                        groups_to_merge.pop(j)
-                    else:
-                        j += 1
-                i += 1
-                
+            groups_to_merge = _merge_similar_groups(list(hash_groups.values()), similarity_threshold)
+
             # 結果に追加（2ファイル以上のグループのみ）
-            duplicate_groups.extend([g for g in groups_to_merge if len(g.files) > 1])
+            duplicate_groups.extend(_multi_file_groups(groups_to_merge))
         else:
             # 特徴量が利用できない場合は、ハッシュベースの結果をそのまま追加
-            duplicate_groups.extend([g for g in hash_groups.values() if len(g.files) > 1])
+            duplicate_groups.extend(_multi_file_groups(hash_groups.values()))
 
     if progress_callback:
         progress_callback(100)
@@ -291,6 +576,7 @@ def find_duplicate_videos(
 ) -> List[DuplicateGroup]:
     """Find duplicate video files without optional feature extraction."""
     base_dir = Path(base_path)
+    progress_callback = _changed_only(progress_callback)
     if progress_callback:
         progress_callback(0)
 
@@ -304,22 +590,15 @@ def find_duplicate_videos(
             progress_callback(100)
         return []
 
-    video_extensions = tuple(e.lower() for e in (extensions or DEFAULT_VIDEO_EXTENSIONS))
+    video_extensions = _extension_set(extensions)
 
-    video_files: List[Path] = []
-    iterator: Iterable[Path]
-    if recursive:
-        iterator = (p for p in base_dir.rglob("*") if p.is_file())
-    else:
-        iterator = (p for p in base_dir.iterdir() if p.is_file())
-
-    for candidate in iterator:
+    video_files: List[Tuple[str, int]] = []
+    for candidate, size in _walk_videos(base_dir, video_extensions, recursive):
         if stop_callback and stop_callback():
             if progress_callback:
                 progress_callback(100)
             return []
-        if candidate.suffix.lower() in video_extensions:
-            video_files.append(candidate)
+        video_files.append((candidate, size))
 
     total_files = len(video_files)
     if total_files == 0:
@@ -330,16 +609,12 @@ def find_duplicate_videos(
     if progress_callback:
         progress_callback(5)
 
-    by_size: Dict[int, List[Path]] = {}
-    for index, path in enumerate(video_files, start=1):
+    by_size: Dict[int, List[str]] = {}
+    for index, (path, size) in enumerate(video_files, start=1):
         if stop_callback and stop_callback():
             if progress_callback:
                 progress_callback(100)
             return []
-        try:
-            size = path.stat().st_size
-        except OSError:
-            continue
         by_size.setdefault(size, []).append(path)
         if progress_callback:
             progress = 5 + int((index / total_files) * 35)
@@ -365,15 +640,24 @@ def find_duplicate_videos(
             if progress_callback:
                 progress_callback(100)
             return duplicates
-        by_hash: Dict[str, List[Path]] = {}
+        fingerprints = _fingerprint_paths(paths)
+        fingerprint_counts = Counter(fingerprints.values())
+        hash_targets: List[Tuple[str, str]] = []
         for path in sorted(paths):
+            fingerprint = fingerprints.get(path)
+            if fingerprint is None or fingerprint_counts[fingerprint] < 2:
+                # 読めないファイルや先頭・末尾が一意なファイルは全体を読まない
+                hashed_count += 1
+                continue
+            hash_targets.append((path, fingerprint))
+
+        by_hash: Dict[str, List[str]] = {}
+        for path, digest in _hash_in_parallel(hash_targets, size):
             if stop_callback and stop_callback():
                 if progress_callback:
                     progress_callback(100)
                 return duplicates
-            try:
-                digest = hash_file(path)
-            except OSError:
+            if digest is None:
                 hashed_count += 1
                 continue
             by_hash.setdefault(digest, []).append(path)
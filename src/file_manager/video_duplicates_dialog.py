@@ -5,6 +5,7 @@
 from __future__ import annotations
 
 import os
+import subprocess
 import sys
 from pathlib import Path
 from typing import List
@@ -72,6 +73,7 @@ class VideoDuplicatesDialog(QDialog):
         real_parent = parent if (parent is not None and hasattr(parent, "window")) else None
         super().__init__(real_parent)
         self.folder_path = folder_path
+        self._folder_path = Path(folder_path)
         self.worker_thread: QThread | None = None
         self.worker: VideoDuplicatesWorker | None = None
 
@@ -158,28 +160,44 @@ class VideoDuplicatesDialog(QDialog):
         self.status_label.setText("エラーが発生しました")
 
     def _populate_tree(self, groups: List[DuplicateGroup]) -> None:
-        self.tree.clear()
-        for index, group in enumerate(groups, start=1):
-            group_title = f"グループ {index} ({len(group.files)} 件)"
-            size_text = f"{group.size:,} バイト"
-            top_item = QTreeWidgetItem([group_title, size_text, group.sha256])
-            top_item.setFirstColumnSpanned(True)
-            self.tree.addTopLevelItem(top_item)
-
-            for file_path in group.files:
-                relative = self._to_relative_path(file_path)
-                child = QTreeWidgetItem([relative, "", ""])
-                child.setData(0, Qt.UserRole, file_path)
-                top_item.addChild(child)
-
-            top_item.setExpanded(True)
+        # 行ごとの再描画・再レイアウトを避けるため、構築中は更新とシグナルを止める
+        sorting_enabled = self.tree.isSortingEnabled()
+        self.tree.setUpdatesEnabled(False)
+        self.tree.setSortingEnabled(False)
+        self.tree.blockSignals(True)
+        try:
+            self.tree.clear()
+            top_items = []
+            for index, group in enumerate(groups, start=1):
+                group_title = f"グループ {index} ({len(group.files)} 件)"
+                size_text = f"{group.size:,} バイト"
+                top_item = QTreeWidgetItem([group_title, size_text, group.sha256])
+
+                children = []
+                for file_path in group.files:
+                    relative = self._to_relative_path(file_path)
+                    child = QTreeWidgetItem([relative, "", ""])
+                    child.setData(0, Qt.UserRole, file_path)
+                    children.append(child)
+                top_item.addChildren(children)
+                top_items.append(top_item)
+
+            # ツリーへはまとめて追加し、追加後にしか効かない設定をまとめて適用する
+            self.tree.addTopLevelItems(top_items)
+            for top_item in top_items:
+                top_item.setFirstColumnSpanned(True)
+                top_item.setExpanded(True)
+        finally:
+            self.tree.blockSignals(False)
+            self.tree.setSortingEnabled(sorting_enabled)
+            self.tree.setUpdatesEnabled(True)
 
         if groups:
             self.tree.resizeColumnToContents(0)
 
     def _to_relative_path(self, file_path: str) -> str:
         try:
-            return str(Path(file_path).relative_to(self.folder_path))
+            return str(Path(file_path).relative_to(self._folder_path))
         except ValueError:
             return file_path
 
@@ -194,9 +212,10 @@ class VideoDuplicatesDialog(QDialog):
             if sys.platform.startswith("win"):
                 os.startfile(file_path)  # type: ignore[attr-defined]
             elif sys.platform == "darwin":
-                os.system(f"open '{file_path}'")
+                subprocess.Popen(["open", file_path], close_fds=True)
             else:
-                os.system(f"xdg-open '{file_path}'")
+                # シェルを介さず起動するので、引用符を含むファイル名もそのまま渡せる
+                subprocess.Popen(["xdg-open", file_path], close_fds=True)
         except Exception as exc:  # noqa: BLE001 - UIでユーザー通知
             QMessageBox.warning(self, "エラー", f"ファイルを開けませんでした:\n{exc}")
 
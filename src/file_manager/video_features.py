@@ -1,27 +1,168 @@
 from __future__ import annotations
 
+import contextlib
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, List, Optional, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 import cv2
 import numpy as np
 from numpy.typing import NDArray
 
+# FFmpegバックエンドがあればハードウェアデコード（NVDEC/QuickSync/VAAPIなど）を要求する
+try:
+    HW_DECODE_AVAILABLE = hasattr(cv2, "CAP_PROP_HW_ACCELERATION") and cv2.videoio_registry.hasBackend(cv2.CAP_FFMPEG)
+except Exception:
+    HW_DECODE_AVAILABLE = False
+
+
+# このサイズ未満の動画は開く前にファイル全体の先読みをカーネルへ依頼する
+PREFETCH_SIZE_LIMIT = 64 * 1024 * 1024
+
+
+def prefetch_small_file(path: str, limit: int = PREFETCH_SIZE_LIMIT) -> bool:
+    """小さな動画をページキャッシュへ非同期に読み込ませる（対応OSのみ）
+
+    デコーダーがコンテナを解析してシークしている間に読み込みが進むため、
+    数枚だけ取り出す短いプレビューでの読み込み待ちを減らせます。
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        if os.fstat(fd).st_size >= limit:
+            return False
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        return True
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def open_video_capture(path: str | Path) -> cv2.VideoCapture:
+    """動画を開く（利用可能ならハードウェアデコードを使い、失敗時は通常の方法で開く）"""
+    path = str(path)
+    prefetch_small_file(path)
+    if HW_DECODE_AVAILABLE:
+        cap = cv2.VideoCapture(
+            path,
+            cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+        )
+        if cap.isOpened():
+            return cap
+        cap.release()
+    return cv2.VideoCapture(path)
+
+
+@contextlib.contextmanager
+def video_capture(path: str | Path) -> Iterator[cv2.VideoCapture]:
+    """open_video_capture で開いたキャプチャを with ブロックの終了時に解放する"""
+    cap = open_video_capture(path)
+    try:
+        yield cap
+    finally:
+        cap.release()
+
+
+# この距離以内の前方フレームはシークせず grab() で読み進める
+MAX_GRAB_GAP = 48
+
+
+def _as_array(values: Iterable, dtype) -> NDArray:
+    """ndarray はそのまま、それ以外のイテラブルは一度リストにしてから配列にする"""
+    if not isinstance(values, np.ndarray):
+        values = list(values)
+    return np.asarray(values, dtype=dtype)
+
+
+def thumbnail_positions_for(max_thumbnails: int) -> NDArray[np.float64]:
+    """サムネイルを取り出す位置（0.0-1.0）を両端を除いた等間隔で返す"""
+    if max_thumbnails == 1:
+        return np.array([0.5])
+    step = 1.0 / (max_thumbnails + 1)
+    return step * np.arange(1, max_thumbnails + 1, dtype=np.float64)
+
+
+def frame_indices_for(positions: Iterable[float], frame_count: int) -> NDArray[np.int64]:
+    """サムネイル位置（0.0-1.0）をフレーム番号の配列に変換"""
+    return (_as_array(positions, np.float64) * frame_count).astype(np.int64)
+
+
+def read_frames_at(
+    cap: cv2.VideoCapture,
+    frame_indices: Iterable[int],
+    max_grab_gap: int = MAX_GRAB_GAP,
+    reuse_buffer: bool = False,
+) -> Iterator[Tuple[int, Optional[NDArray[np.uint8]]]]:
+    """指定したフレームを読み出し、(元の並びでのインデックス, フレーム) を返す
+
+    フレーム番号の昇順に読み出すため、戻ってシークすることはありません。
+    直前の位置から近い前方のフレームはシークせずに grab() で進め、目的のフレームだけ
+    retrieve() で画素を取り出します。読み込めなかったフレームは None になります。
+
+    reuse_buffer=True の場合は前回のフレーム配列へ上書きでデコードし、フレームごとの
+    確保（1080pで約6MB）を省きます。受け取ったフレームは次の反復までに使い終えてください。
+    """
+    indices = _as_array(frame_indices, np.int64)
+    current: Optional[int] = None  # 次の grab() で得られるフレーム番号
+    buffer: Optional[NDArray[np.uint8]] = None
+    for i in np.argsort(indices, kind="stable").tolist():
+        target = int(indices[i])
+        if current is None or target < current or target - current > max_grab_gap:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            current = target
+        while current < target and cap.grab():
+            current += 1
+        if current == target and cap.grab():
+            current += 1
+            ret, frame = cap.retrieve(buffer) if buffer is not None else cap.retrieve()
+            if ret and reuse_buffer:
+                buffer = frame
+            yield i, frame if ret else None
+        else:
+            current = None
+            yield i, None
+
 @dataclass
 class VideoFeatures:
     """動画の特徴量情報"""
     
     path: str
     thumbnail_positions: List[float]  # サムネイル位置（0.0-1.0）
-    frame_histograms: List[NDArray[np.float32]]  # 各フレームのヒストグラム
-    frame_features: List[NDArray[np.float32]]  # 各フレームの特徴量
+    frame_histograms: NDArray[np.float32]  # 各フレームのヒストグラム（フレーム数 × ビン数）
+    frame_features: NDArray[np.int8] | NDArray[np.float32]  # 各フレームの特徴量（フレーム数 × 次元数、抽出時は int8 量子化済み）
     average_color: NDArray[np.float32]  # 平均色
     duration: float
     resolution: Tuple[int, int]
     fps: float
     file_size: int
+    features_normalized: bool = False  # 浮動小数点の frame_features が単位ベクトル化済みか
+    feature_scales: Optional[NDArray[np.float32]] = None  # int8 の frame_features を実数に戻す行ごとの倍率
+
+    def __post_init__(self) -> None:
+        # ベクトルのリストで渡された場合も2次元配列にそろえる
+        self.frame_histograms = _stack_rows(self.frame_histograms)
+        if not (isinstance(self.frame_features, np.ndarray) and self.frame_features.dtype == np.int8):
+            self.frame_features = _stack_rows(self.frame_features)
+        # similarity_score で使う値を一度だけ作成しておく
+        # （読めなかったフレームの分は行が詰められるので、位置も行数にそろえる）
+        self._positions = np.asarray(self.thumbnail_positions, dtype=np.float64)[:len(self.frame_histograms)]
+        if self.frame_features.dtype == np.int8:
+            # extract_video_features が正規化・量子化済みで保持している
+            self._feature_matrix = self.frame_features
+            self._feature_scales = np.asarray(self.feature_scales, dtype=np.float32)
+        else:
+            # 外部で作られた浮動小数点の特徴量はここで一度だけ正規化・量子化する
+            features = self.frame_features
+            if not self.features_normalized:
+                features = normalize_feature_rows(features)
+            self._feature_matrix, self._feature_scales = quantize_features(features)
 
     @property
     def frame_count(self) -> int:
@@ -47,33 +188,23 @@ class VideoFeatures:
         w2, h2 = other.resolution
         resolution_sim = (min(w1, w2) * min(h1, h2)) / (max(w1, w2) * max(h1, h2))
         
-        # ヒストグラムの類似度（サンプリング位置が近いもの同士で比較）
-        hist_sims = []
-        for i, hist1 in enumerate(self.frame_histograms):
-            best_sim = 0.0
-            for j, hist2 in enumerate(other.frame_histograms):
-                pos_diff = abs(self.thumbnail_positions[i] - other.thumbnail_positions[j])
-                if pos_diff > 0.1:  # 位置が離れすぎている場合はスキップ
-                    continue
-                sim = np.minimum(hist1, hist2).sum()
-                best_sim = max(best_sim, sim)
-            if best_sim > 0:
-                hist_sims.append(best_sim)
-        histogram_sim = np.mean(hist_sims) if hist_sims else 0.0
-        
-        # 特徴量の類似度
-        feature_sims = []
-        for i, feat1 in enumerate(self.frame_features):
-            best_sim = 0.0
-            for j, feat2 in enumerate(other.frame_features):
-                pos_diff = abs(self.thumbnail_positions[i] - other.thumbnail_positions[j])
-                if pos_diff > 0.1:
-                    continue
-                sim = np.dot(feat1, feat2) / (np.linalg.norm(feat1) * np.linalg.norm(feat2))
-                best_sim = max(best_sim, sim)
-            if best_sim > 0:
-                feature_sims.append(best_sim)
-        feature_sim = np.mean(feature_sims) if feature_sims else 0.0
+        # サンプリング位置が近いフレーム同士だけを比較する
+        # ヒストグラムと特徴量は同じフレームの行なので、マスクは1度だけ作る
+        pos_mask = _position_mask(self._positions, other._positions)
+        histogram_sim = 0.0
+        feature_sim = 0.0
+        if pos_mask.any():  # 比較できる組がなければ行列計算ごと省く
+            # ヒストグラムの類似度
+            hist1, hist2 = self.frame_histograms, other.frame_histograms
+            hist_sims = _masked_min_sums(hist1, hist2, pos_mask)
+            histogram_sim = _mean_best_match(hist_sims, pos_mask)
+            
+            # 特徴量の類似度（正規化済みの行列同士の内積がコサイン類似度になる）
+            # int8 のまま int32 で積和し、最後に量子化の倍率を戻す
+            feat1, feat2 = self._feature_matrix, other._feature_matrix
+            dots = feat1.astype(np.int32) @ feat2.T.astype(np.int32)
+            scales = self._feature_scales[:, None] * other._feature_scales[None, :]
+            feature_sim = _mean_best_match(dots * scales, pos_mask)
         
         # 重み付き平均で総合的な類似度を計算
         similarity = (
@@ -85,34 +216,91 @@ class VideoFeatures:
         
         return float(similarity)
 
+def _stack_rows(rows: NDArray[np.float32] | List[NDArray[np.float32]]) -> NDArray[np.float32]:
+    """ベクトルのリストまたは配列を float32 の2次元配列にする（空なら0行）"""
+    if isinstance(rows, np.ndarray) and rows.ndim == 2:
+        return rows.astype(np.float32, copy=False)
+    if len(rows) == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack(rows).astype(np.float32, copy=False)
+
+def _position_mask(positions1: NDArray[np.float64], positions2: NDArray[np.float64]) -> NDArray[np.bool_]:
+    """サンプリング位置の差が0.1以内の組み合わせをTrueにしたマスク"""
+    return np.abs(positions1[:, None] - positions2[None, :]) <= 0.1
+
+def _masked_min_sums(hist1: NDArray[np.float32], hist2: NDArray[np.float32], mask: NDArray[np.bool_]) -> NDArray[np.float32]:
+    """マスクが True の組だけヒストグラムの共通部分（min の総和）を計算する
+
+    位置が近い組は対角付近の帯に限られるため、フレーム数が多いほど全組を計算するより軽くなります。
+    """
+    rows, cols = np.nonzero(mask)
+    sims = np.zeros(mask.shape, dtype=np.float32)
+    sims[rows, cols] = np.minimum(hist1[rows], hist2[cols]).sum(axis=1)
+    return sims
+
+def _mean_best_match(sims: NDArray[np.float32], mask: NDArray[np.bool_]) -> float:
+    """各行の最良一致（マスク外は除外）のうち正の値だけを平均する"""
+    best = np.where(mask, sims, 0.0).max(axis=1)
+    best = best[best > 0]
+    return float(best.mean()) if best.size else 0.0
+
+def normalize_feature_rows(features: NDArray[np.float32]) -> NDArray[np.float32]:
+    """特徴量ベクトル（1次元または行ごと）をL2ノルム1に正規化する"""
+    norms = np.linalg.norm(features, axis=-1, keepdims=True)
+    return np.divide(features, norms, out=np.zeros_like(features), where=norms > 0)
+
+FEATURE_QUANT_LEVEL = 127  # int8 量子化で各行の絶対値最大の成分を写す値
+
+def quantize_features(features: NDArray[np.float32]) -> Tuple[NDArray[np.int8], NDArray[np.float32]]:
+    """特徴量を行ごとに int8 へ対称量子化し、(量子化値, 行ごとの倍率) を返す
+
+    量子化値に倍率を掛けると元の値に戻ります。float32 に比べてメモリと帯域は1/4です。
+    """
+    features = np.atleast_2d(features)
+    peaks = np.abs(features).max(axis=1) if features.shape[1] else np.zeros(len(features))
+    scales = np.where(peaks > 0, peaks / FEATURE_QUANT_LEVEL, 1.0).astype(np.float32)
+    quantized = np.rint(features / scales[:, None])
+    return np.clip(quantized, -FEATURE_QUANT_LEVEL, FEATURE_QUANT_LEVEL).astype(np.int8), scales
+
+HISTOGRAM_BINS = (8, 8)  # H, S のビン数
+HISTOGRAM_SIZE = HISTOGRAM_BINS[0] * HISTOGRAM_BINS[1]
+FEATURE_GRID = (8, 8)
+EDGE_FEATURE_SIZE = FEATURE_GRID[0] * FEATURE_GRID[1]
+FRAME_FEATURE_SIZE = EDGE_FEATURE_SIZE * 4  # エッジ1ch + 色3ch
+
 def compute_frame_features(frame: NDArray[np.uint8]) -> Tuple[NDArray[np.float32], NDArray[np.float32]]:
     """フレームからヒストグラムと特徴量を抽出"""
-    # HSVヒストグラム
+    # HSVヒストグラム（calcHist の結果は float32 なのでそのまま正規化して平坦化する）
     hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    hist = cv2.calcHist([hsv], [0, 1], None, [8, 8], [0, 180, 0, 256])
-    hist = cv2.normalize(hist, hist).flatten()
+    hist = cv2.calcHist([hsv], [0, 1], None, list(HISTOGRAM_BINS), [0, 180, 0, 256])
+    hist = cv2.normalize(hist, hist).reshape(-1)
     
-    # エッジと色の特徴量
+    # エッジと色の特徴量を1つの出力バッファへ直接書き込む
     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     edges = cv2.Canny(gray, 100, 200)
-    edge_features = cv2.resize(edges, (8, 8)).flatten() / 255.0
-    
-    color_features = cv2.resize(frame, (8, 8)).reshape(-1) / 255.0
-    features = np.concatenate([edge_features, color_features])
+    features = np.empty(FRAME_FEATURE_SIZE, dtype=np.float32)
+    np.divide(cv2.resize(edges, FEATURE_GRID).reshape(-1), 255.0,
+              out=features[:EDGE_FEATURE_SIZE], casting="same_kind")
+    np.divide(cv2.resize(frame, FEATURE_GRID).reshape(-1), 255.0,
+              out=features[EDGE_FEATURE_SIZE:], casting="same_kind")
     
-    return hist.astype(np.float32), features.astype(np.float32)
+    return hist, features
 
 def extract_video_features(
     video_path: str | Path,
     max_thumbnails: int = 6,
-    progress_callback: Optional[Callable[[int], None]] = None
+    progress_callback: Optional[Callable[[int], None]] = None,
+    capture: Optional[cv2.VideoCapture] = None,
 ) -> Optional[VideoFeatures]:
-    """動画から特徴量を抽出"""
+    """動画から特徴量を抽出
+
+    capture を渡した場合はそのキャプチャを使い回し、解放は呼び出し側に任せます。
+    """
     if not cv2 or not np:  # OpenCV/NumPyが利用できない場合
         return None
         
     path = str(video_path)
-    cap = cv2.VideoCapture(path)
+    cap = capture if capture is not None else open_video_capture(path)
     if not cap.isOpened():
         return None
         
@@ -128,57 +316,61 @@ def extract_video_features(
             return None
             
         # サムネイル位置の計算（0.0-1.0）
-        if max_thumbnails == 1:
-            positions = [0.5]
-        else:
-            step = 1.0 / (max_thumbnails + 1)
-            positions = [step * (i + 1) for i in range(max_thumbnails)]
+        position_array = thumbnail_positions_for(max_thumbnails)
+        positions = position_array.tolist()
             
-        histograms = []
-        features = []
-        average_colors = []
+        # 読み込めたフレームの分だけ先頭から行を埋める
+        histograms = np.empty((len(positions), HISTOGRAM_SIZE), dtype=np.float32)
+        features = np.empty((len(positions), FRAME_FEATURE_SIZE), dtype=np.float32)
+        average_colors = np.empty((len(positions), 3), dtype=np.float64)
+        read_count = 0
         
-        for i, pos in enumerate(positions):
+        # 位置は昇順なので、読み出し順がそのままヒストグラムの並びになる
+        frame_indices = frame_indices_for(position_array, total_frames)
+        # フレームはその場で特徴量にするので、デコード先の配列を使い回せる
+        for done, (_, frame) in enumerate(read_frames_at(cap, frame_indices, reuse_buffer=True)):
             if progress_callback:
-                progress = int((i / len(positions)) * 100)
+                progress = int((done / len(positions)) * 100)
                 progress_callback(progress)
                 
-            frame_pos = int(pos * total_frames)
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-            ret, frame = cap.read()
-            
-            if not ret:
+            if frame is None:
                 continue
                 
             # ヒストグラムと特徴量の抽出
             hist, feat = compute_frame_features(frame)
-            histograms.append(hist)
-            features.append(feat)
+            histograms[read_count] = hist
+            features[read_count] = feat
             
             # 平均色の計算
-            average_color = frame.mean(axis=(0, 1))
-            average_colors.append(average_color)
+            average_colors[read_count] = frame.mean(axis=(0, 1))
+            read_count += 1
             
-        if not histograms:  # 1フレームも読めなかった場合
+        if read_count == 0:  # 1フレームも読めなかった場合
             return None
             
         # 全フレームの平均色
-        average_color = np.mean(average_colors, axis=0).astype(np.float32)
+        average_color = average_colors[:read_count].mean(axis=0).astype(np.float32)
+        
+        # 比較時にノルムを計算し直さないよう、単位ベクトルを int8 に量子化して保持する
+        quantized, scales = quantize_features(normalize_feature_rows(features[:read_count]))
         
         return VideoFeatures(
             path=path,
             thumbnail_positions=positions,
-            frame_histograms=histograms,
-            frame_features=features,
+            frame_histograms=histograms[:read_count],
+            frame_features=quantized,
             average_color=average_color,
             duration=duration,
             resolution=(width, height),
             fps=fps,
-            file_size=os.path.getsize(path)
+            file_size=os.path.getsize(path),
+            features_normalized=True,
+            feature_scales=scales
         )
     
     except Exception:
         return None
     
     finally:
-        cap.release()
\ No newline at end of file
+        if capture is None:
+            cap.release()
\ No newline at end of file
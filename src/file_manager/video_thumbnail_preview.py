@@ -4,12 +4,14 @@
 
 from __future__ import annotations
 
+import functools
 import os
+from collections import OrderedDict
 from pathlib import Path
 from typing import Iterable, List, Optional
 
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import Qt, QThreadPool, QTimer
+from PySide6.QtGui import QImage, QPixmap, QPixmapCache
 from PySide6.QtWidgets import (
     QFrame,
     QHBoxLayout,
@@ -19,18 +21,87 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
     QWidget,
     QSpacerItem,
+    QStackedLayout,
 )
 
 try:
-    from .video_digest import VideoDigestWorker, VideoDigestGenerator, OPENCV_AVAILABLE
+    from .video_digest import (
+        VideoDigestGenerator,
+        VideoDigestSignals,
+        VideoDigestTask,
+        OPENCV_AVAILABLE,
+        unpack_thumbnails,
+    )
 
     VIDEO_DIGEST_AVAILABLE = True
 except Exception:  # pragma: no cover - fallback when optional dependency missing
-    VideoDigestWorker = None  # type: ignore
     VideoDigestGenerator = None  # type: ignore
+    VideoDigestSignals = None  # type: ignore
+    VideoDigestTask = None  # type: ignore
+    unpack_thumbnails = None  # type: ignore
     OPENCV_AVAILABLE = False
     VIDEO_DIGEST_AVAILABLE = False
 
+# 縮小済みサムネイルを保持する動画数の上限（古いものから破棄する）
+PIXMAP_CACHE_LIMIT = 32
+# 選択が落ち着いてからワーカーを起動するまでの待ち時間（ミリ秒）
+SELECTION_DEBOUNCE_MS = 130
+# 動画ファイルかどうかの判定結果を覚えておく件数の上限（古いものから破棄する）
+IS_VIDEO_CACHE_LIMIT = 1024
+# QPixmapCache の容量（KB）。サムネイルを他のウィジェットと共有できるよう既定値より広げる
+QPIXMAP_CACHE_LIMIT_KB = 128 * 1024
+
+
+def digest_cache_key(
+    video_path: str, stat: Optional[os.stat_result], thumbnail_size: tuple[int, int], max_thumbnails: int
+) -> Optional[tuple]:
+    """縮小済みサムネイルのキャッシュキー（ファイルが更新されると変わる）
+
+    (解決済みパス, 更新時刻, サイズ, サムネイルサイズ, 枚数) のタプルを返します。stat が None なら None。
+    """
+    if stat is None:
+        return None
+    return (video_path, stat.st_mtime_ns, stat.st_size, tuple(thumbnail_size), max_thumbnails)
+
+
+def thumbnail_cache_key(cache_key: tuple, index: int, total: int) -> str:
+    """QPixmapCache に登録するサムネイル1枚分のキー
+
+    cache_key は digest_cache_key のタプル。total は実際に登録した枚数で、
+    読めなかったフレームがあると cache_key の枚数より少なくなります。
+    """
+    path, mtime_ns, size, (width, height), count = cache_key
+    return f"vthumb:{mtime_ns}:{size}:{width}x{height}:{index}/{total}/{count}:{path}"
+
+
+def find_cached_thumbnails(
+    video_path: str, thumbnail_size: tuple[int, int], max_thumbnails: int
+) -> Optional[List[QPixmap]]:
+    """プレビューが QPixmapCache に登録した、同じ動画・同じ設定のサムネイルを返す
+
+    ダイジェストダイアログなど他のウィジェットが再デコードを省くためのもの。
+    登録がない場合や1枚でも破棄されている場合は None を返します。
+    """
+    resolved = _resolve_cached(str(video_path))
+    try:
+        stat = os.stat(resolved)
+    except OSError:
+        return None
+    cache_key = digest_cache_key(resolved, stat, thumbnail_size, max_thumbnails)
+    # 登録された枚数は分からないため、多い方から先頭の1枚の有無で探す
+    for total in range(max_thumbnails, 0, -1):
+        if QPixmapCache.find(thumbnail_cache_key(cache_key, 0, total)) is None:
+            continue
+        pixmaps = [QPixmapCache.find(thumbnail_cache_key(cache_key, index, total)) for index in range(total)]
+        return pixmaps if all(pixmap is not None for pixmap in pixmaps) else None
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_cached(path: str) -> str:
+    """Path.resolve() の結果を覚えておき、選択のたびのシンボリックリンク解決を省く"""
+    return str(Path(path).resolve())
+
 
 class VideoThumbnailPreview(QWidget):
     """選択中の動画ファイルのサムネイルを表示する簡易プレビュー."""
@@ -44,15 +115,35 @@ class VideoThumbnailPreview(QWidget):
     ) -> None:
         super().__init__(parent)
         self.setObjectName("video-thumbnail-preview")
-        self._available = VIDEO_DIGEST_AVAILABLE and VideoDigestWorker is not None
+        self._available = VIDEO_DIGEST_AVAILABLE and VideoDigestTask is not None
         self._digest_helper = VideoDigestGenerator() if self._available and VideoDigestGenerator else None
         self._max_thumbnails = max_thumbnails
         self._thumbnail_size = thumbnail_size
         self._current_video: Optional[str] = None
-        self._worker: Optional[VideoDigestWorker] = None
+        # 選択のたびにスレッドを作らず、常駐するプールのスレッドでダイジェストを生成する
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = VideoDigestSignals() if self._available else None
+        if self._signals is not None:
+            self._signals.digest_generated.connect(self._handle_packed_digest)
+            self._signals.thumbnail_ready.connect(self._handle_thumbnail)
+            self._signals.progress_updated.connect(self._handle_progress)
+            self._signals.error_occurred.connect(self._handle_error)
         self._active_token = 0
         self._token_counter = 0
-        self._thumbnail_labels: List[QLabel] = []
+        # 表示用とその裏で書き込む用の2ページ分のラベル（表示中のページを切り替えて入れ替える）
+        self._pages: List[QWidget] = []
+        self._page_labels: List[List[QLabel]] = []
+        # (パス, 更新時刻, サイズ, サムネイルサイズ, 枚数) -> QPixmapCache のキーのリスト
+        # （画像本体はアプリ全体で共有される QPixmapCache に置く）
+        self._pixmap_cache: OrderedDict[tuple, List[str]] = OrderedDict()
+        if QPixmapCache.cacheLimit() < QPIXMAP_CACHE_LIMIT_KB:
+            QPixmapCache.setCacheLimit(QPIXMAP_CACHE_LIMIT_KB)
+        self._current_cache_key: Optional[tuple] = None
+        self._pending_video: Optional[str] = None
+        # 非表示の間に選ばれた動画（表示されたときに生成を始める）
+        self._deferred_video: Optional[str] = None
+        self._is_video_cache: dict[tuple[str, int], bool] = {}
 
         self._build_ui()
         self.display_video(None)
@@ -61,6 +152,13 @@ class VideoThumbnailPreview(QWidget):
     def is_available(self) -> bool:
         return self._available
 
+    @property
+    def _thumbnail_labels(self) -> List[QLabel]:
+        """表示中のページのラベル"""
+        if not self._page_labels:
+            return []
+        return self._page_labels[self._thumb_stack.currentIndex()]
+
     def _build_ui(self) -> None:
         layout = QVBoxLayout(self)
         layout.setContentsMargins(8, 8, 8, 8)
@@ -87,16 +185,48 @@ class VideoThumbnailPreview(QWidget):
         self._scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
         self._thumb_container = QWidget()
-        self._thumb_layout = QHBoxLayout(self._thumb_container)
-        self._thumb_layout.setContentsMargins(0, 0, 0, 0)
-        self._thumb_layout.setSpacing(8)
-        self._thumb_layout.addItem(QSpacerItem(0, 0, QSizePolicy.Expanding, QSizePolicy.Minimum))
+        self._thumb_stack = QStackedLayout(self._thumb_container)
+        self._thumb_stack.setContentsMargins(0, 0, 0, 0)
+        self._build_label_pool()
 
         self._scroll_area.setWidget(self._thumb_container)
         frame_layout.addWidget(self._scroll_area)
 
         layout.addWidget(frame)
 
+        # 一覧をスクロールしたときなど、連続した選択変更ではワーカーを最後の1回だけ起動する
+        self._pending_timer = QTimer(self)
+        self._pending_timer.setSingleShot(True)
+        self._pending_timer.setInterval(SELECTION_DEBOUNCE_MS)
+        self._pending_timer.timeout.connect(self._fire_pending)
+
+    def _build_label_pool(self) -> None:
+        """サムネイル用のラベルを最大枚数分ずつ2ページ作っておき、表示のたびに使い回す"""
+        for page in self._pages:
+            self._thumb_stack.removeWidget(page)
+            page.deleteLater()
+        self._pages = []
+        self._page_labels = []
+        for _ in range(2):
+            page = QWidget()
+            page_layout = QHBoxLayout(page)
+            page_layout.setContentsMargins(0, 0, 0, 0)
+            page_layout.setSpacing(8)
+            labels = []
+            for _ in range(self._max_thumbnails):
+                label = QLabel()
+                label.setAlignment(Qt.AlignCenter)
+                label.setFixedSize(self._thumbnail_size[0], self._thumbnail_size[1])
+                label.setFrameShape(QFrame.Panel)
+                label.setFrameShadow(QFrame.Sunken)
+                label.hide()
+                page_layout.addWidget(label)
+                labels.append(label)
+            page_layout.addItem(QSpacerItem(0, 0, QSizePolicy.Expanding, QSizePolicy.Minimum))
+            self._thumb_stack.addWidget(page)
+            self._pages.append(page)
+            self._page_labels.append(labels)
+
     def set_preferences(
         self,
         *,
@@ -131,6 +261,8 @@ class VideoThumbnailPreview(QWidget):
             if sanitized_size != self._thumbnail_size:
                 self._thumbnail_size = sanitized_size
                 changed = True
+        if changed:
+            self._build_label_pool()
         if changed and self._current_video:
             current = self._current_video
             self._current_video = None
@@ -138,13 +270,15 @@ class VideoThumbnailPreview(QWidget):
 
     def display_video(self, video_path: Optional[str]) -> None:
         """サムネイルを動画パスに合わせて更新."""
-        resolved = str(Path(video_path).resolve()) if video_path else None
+        resolved = _resolve_cached(str(video_path)) if video_path else None
         if resolved == self._current_video and resolved is not None:
             return
 
         self._current_video = resolved
+        self._current_cache_key = None
+        self._pending_video = None
+        self._deferred_video = None
         self._active_token += 1
-        token = self._active_token
 
         if not self._available:
             self._show_message("動画ダイジェスト機能が無効のためサムネイルを表示できません", clear_thumbnails=True)
@@ -154,31 +288,60 @@ class VideoThumbnailPreview(QWidget):
             self._show_message("動画を選択するとサムネイルを表示します", clear_thumbnails=True)
             return
 
-        helper = self._digest_helper
-        if helper and not helper.is_video_file(resolved):
+        # stat は1回だけ行い、動画判定とキャッシュキーの両方に使う
+        try:
+            stat = os.stat(resolved)
+        except OSError:
+            stat = None
+
+        if self._digest_helper and not self._is_video(resolved, stat):
             name = Path(resolved).name
             self._show_message(f"{name} は動画ファイルではありません", clear_thumbnails=True)
             return
 
+        cache_key = self._cache_key(resolved, stat)
+        cached = self._cached_pixmaps(cache_key) if cache_key is not None else None
+        if cached is not None:
+            # 一度表示した動画は再デコードせず、縮小済みの画像をそのまま並べ直す
+            self._pixmap_cache.move_to_end(cache_key)
+            self._render_pixmaps(Path(resolved).name, cached)
+            return
+
+        self._current_cache_key = cache_key
         self._show_message("サムネイルを生成中です…", clear_thumbnails=True)
-        self._start_worker(resolved, token)
+        if not self.isVisible():
+            # 折りたたまれたパネルや非表示のタブではデコードせず、表示されるまで待つ
+            self._deferred_video = resolved
+            return
+        self._pending_video = resolved
+        self._pending_timer.start()
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        video_path = self._deferred_video
+        self._deferred_video = None
+        if video_path and video_path == self._current_video:
+            self._pending_video = video_path
+            self._pending_timer.start()
+
+    def _fire_pending(self) -> None:
+        """選択が落ち着いたら、最後に選ばれた動画のワーカーを起動する"""
+        video_path = self._pending_video
+        self._pending_video = None
+        if not video_path or video_path != self._current_video:
+            return
+        self._start_worker(video_path, self._active_token)
 
     def clear(self) -> None:
         self.display_video(None)
 
     def shutdown(self) -> None:
         self._active_token += 1
-        worker = self._worker
-        self._worker = None
-        if worker is not None:
-            worker.digest_generated.disconnect()
-            worker.progress_updated.disconnect()
-            worker.error_occurred.disconnect()
-            worker.finished.disconnect()
-            if not worker.isFinished():
-                worker.finished.connect(worker.deleteLater)
-            else:
-                worker.deleteLater()
+        self._pending_timer.stop()
+        self._pending_video = None
+        self._deferred_video = None
+        # 未着手のタスクは取り消す（実行中のものの結果はトークンの比較で読み捨てられる）
+        self._pool.clear()
 
     # ------------------------------------------------------------------
     # 内部処理
@@ -188,33 +351,84 @@ class VideoThumbnailPreview(QWidget):
         if clear_thumbnails:
             self._clear_thumbnails()
 
+    def _is_video(self, video_path: str, stat: Optional[os.stat_result]) -> bool:
+        """動画ファイルかどうか（同じ更新時刻のファイルは前回の判定結果を使う）"""
+        if stat is None:
+            return False
+        key = (video_path, stat.st_mtime_ns)
+        result = self._is_video_cache.get(key)
+        if result is None:
+            result = self._digest_helper.is_video_file(video_path)
+            cache = self._is_video_cache
+            cache[key] = result
+            if len(cache) > IS_VIDEO_CACHE_LIMIT:
+                del cache[next(iter(cache))]
+        return result
+
+    def _cache_key(self, video_path: str, stat: Optional[os.stat_result]) -> Optional[tuple]:
+        """縮小済みサムネイルのキャッシュキー（ファイルが更新されると変わる）"""
+        return digest_cache_key(video_path, stat, self._thumbnail_size, self._max_thumbnails)
+
+    def _cached_pixmaps(self, cache_key: tuple) -> Optional[List[QPixmap]]:
+        """キャッシュ済みのサムネイルを返す（1枚でも QPixmapCache から消えていれば None）"""
+        keys = self._pixmap_cache.get(cache_key)
+        if keys is None:
+            return None
+        pixmaps = []
+        for key in keys:
+            pixmap = QPixmapCache.find(key)
+            if pixmap is None:
+                del self._pixmap_cache[cache_key]
+                return None
+            pixmaps.append(pixmap)
+        return pixmaps
+
+    def _store_pixmaps(self, cache_key: tuple, pixmaps: List[QPixmap]) -> None:
+        keys = []
+        for index, pixmap in enumerate(pixmaps):
+            key = thumbnail_cache_key(cache_key, index, len(pixmaps))
+            QPixmapCache.insert(key, pixmap)
+            keys.append(key)
+        cache = self._pixmap_cache
+        cache[cache_key] = keys
+        cache.move_to_end(cache_key)
+        while len(cache) > PIXMAP_CACHE_LIMIT:
+            cache.popitem(last=False)
+
     def _clear_thumbnails(self) -> None:
-        for label in self._thumbnail_labels:
-            self._thumb_layout.removeWidget(label)
-            label.deleteLater()
-        self._thumbnail_labels.clear()
+        self._swap_page([])
 
-    def _start_worker(self, video_path: str, token: int) -> None:
-        worker = VideoDigestWorker(
-            video_path,
-            max_thumbnails=self._max_thumbnails,
-            thumbnail_size=self._thumbnail_size,
-            parent=self,
-        )
-        self._worker = worker
+    def _swap_page(self, pixmaps: List[QPixmap]) -> None:
+        """裏のページにサムネイルを書き込んでから表示ページを切り替える
 
-        worker.digest_generated.connect(
-            lambda path, pixmaps, tk=token: self._handle_digest(tk, path, pixmaps)
-        )
-        worker.progress_updated.connect(
-            lambda value, tk=token: self._handle_progress(tk, value)
-        )
-        worker.error_occurred.connect(
-            lambda message, tk=token: self._handle_error(tk, message)
+        表示中のラベルを1枚ずつ差し替えると、そのたびにレイアウトが再計算されるため、
+        全体を一度に入れ替えます。
+        """
+        if not self._page_labels:
+            return
+        current = self._thumb_stack.currentIndex()
+        target = 1 - current
+        for index, label in enumerate(self._page_labels[target]):
+            if index < len(pixmaps):
+                label.setPixmap(pixmaps[index])
+                label.show()
+            else:
+                label.clear()
+                label.hide()
+        self._thumb_stack.setCurrentIndex(target)
+        for label in self._page_labels[current]:
+            label.clear()
+
+    def _start_worker(self, video_path: str, token: int) -> None:
+        self._pool.start(
+            VideoDigestTask(
+                video_path,
+                token,
+                self._signals,
+                max_thumbnails=self._max_thumbnails,
+                thumbnail_size=self._thumbnail_size,
+            )
         )
-        worker.finished.connect(lambda tk=token: self._handle_finished(tk))
-        worker.finished.connect(worker.deleteLater)
-        worker.start()
 
     def _handle_progress(self, token: int, value: int) -> None:
         if token != self._active_token:
@@ -223,32 +437,90 @@ class VideoThumbnailPreview(QWidget):
         suffix = f" {value}%" if value < 100 else ""
         self._status_label.setText(f"{name} のサムネイルを生成中…{suffix}")
 
-    def _handle_digest(self, token: int, video_path: str, pixmaps: Iterable[QPixmap]) -> None:
+    def _handle_thumbnail(self, token: int, video_path: str, index: int, image: QImage) -> None:
+        """デコードできたサムネイルから順に表示する（全部そろったら _handle_digest で差し替える）"""
+        if token != self._active_token:
+            return
+        if video_path != self._current_video:
+            return
+        labels = self._thumbnail_labels
+        if not 0 <= index < len(labels):
+            return
+        label = labels[index]
+        label.setPixmap(self._scale(QPixmap.fromImage(image), Qt.FastTransformation))
+        label.show()
+
+    def _handle_packed_digest(
+        self, token: int, video_path: str, data: bytes, width: int, height: int
+    ) -> None:
+        # 展開したQImageは data を参照しているが、_handle_digest ですぐQPixmapへ変換される
+        self._handle_digest(token, video_path, unpack_thumbnails(data, width, height))
+
+    def _handle_digest(
+        self, token: int, video_path: str, pixmaps: Iterable[QImage | QPixmap]
+    ) -> None:
         if token != self._active_token:
             return
-        if not self._current_video or Path(video_path).resolve() != Path(self._current_video).resolve():
+        # ワーカーには解決済みのパスを渡しているので、文字列のまま比較できる
+        if video_path != self._current_video:
             return
-        self._clear_thumbnails()
         name = Path(video_path).name
-        pixmap_list = list(pixmaps)
-        if not pixmap_list:
+        # ワーカーからはスレッド安全なQImageで届くため、GUIスレッドでQPixmapに変換する
+        sources = [
+            QPixmap.fromImage(pixmap) if isinstance(pixmap, QImage) else pixmap
+            for pixmap in pixmaps
+        ]
+        # まずは高速な縮小ですぐに表示し、高品質な縮小はイベントループが空いてから行う
+        scaled_list = [self._scale(pixmap, Qt.FastTransformation) for pixmap in sources]
+        cache_key = self._current_cache_key
+        if scaled_list and cache_key is not None:
+            self._store_pixmaps(cache_key, scaled_list)
+        self._render_pixmaps(name, scaled_list)
+        if any(not self._is_final_size(pixmap) for pixmap in sources):
+            QTimer.singleShot(
+                0,
+                self,
+                lambda tk=token, key=cache_key, src=sources: self._upgrade_thumbnails(tk, key, src),
+            )
+
+    def _is_final_size(self, pixmap: QPixmap) -> bool:
+        return (pixmap.width(), pixmap.height()) == self._thumbnail_size
+
+    def _scale(self, pixmap: QPixmap, mode: Qt.TransformationMode) -> QPixmap:
+        # ワーカーはデコード直後に表示サイズへ縮小して送ってくるので、そのまま使える
+        if self._is_final_size(pixmap):
+            return pixmap
+        return pixmap.scaled(
+            self._thumbnail_size[0],
+            self._thumbnail_size[1],
+            Qt.KeepAspectRatio,
+            mode,
+        )
+
+    def _apply_scaled(self, label: QLabel, pixmap: QPixmap, mode: Qt.TransformationMode) -> QPixmap:
+        scaled = self._scale(pixmap, mode)
+        label.setPixmap(scaled)
+        return scaled
+
+    def _upgrade_thumbnails(
+        self, token: int, cache_key: Optional[tuple], sources: List[QPixmap]
+    ) -> None:
+        """高速縮小で表示したサムネイルを高品質な縮小で描き直す"""
+        if token != self._active_token:
+            return
+        smooth = [
+            self._apply_scaled(label, pixmap, Qt.SmoothTransformation)
+            for label, pixmap in zip(self._thumbnail_labels, sources)
+        ]
+        if cache_key is not None and cache_key in self._pixmap_cache:
+            self._store_pixmaps(cache_key, smooth)
+
+    def _render_pixmaps(self, name: str, pixmaps: List[QPixmap]) -> None:
+        """縮小済みのサムネイルをラベルとして並べる"""
+        self._swap_page(pixmaps)
+        if not pixmaps:
             self._status_label.setText(f"{name} のサムネイルを生成できませんでした")
             return
-        for pixmap in pixmap_list:
-            label = QLabel()
-            label.setAlignment(Qt.AlignCenter)
-            scaled = pixmap.scaled(
-                self._thumbnail_size[0],
-                self._thumbnail_size[1],
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation,
-            )
-            label.setPixmap(scaled)
-            label.setFixedSize(self._thumbnail_size[0], self._thumbnail_size[1])
-            label.setFrameShape(QFrame.Panel)
-            label.setFrameShadow(QFrame.Sunken)
-            self._thumb_layout.insertWidget(self._thumb_layout.count() - 1, label)
-            self._thumbnail_labels.append(label)
         backend = "OpenCV" if OPENCV_AVAILABLE else "プレースホルダー"
         self._status_label.setText(f"{name} のサムネイル（{backend}）")
 
@@ -257,9 +529,12 @@ class VideoThumbnailPreview(QWidget):
             return
         self._show_message(f"サムネイル生成でエラーが発生しました: {message}", clear_thumbnails=True)
 
-    def _handle_finished(self, token: int) -> None:
-        if token == self._active_token:
-            self._worker = None
-
 
-__all__ = ["VideoThumbnailPreview", "VIDEO_DIGEST_AVAILABLE", "OPENCV_AVAILABLE"]
+__all__ = [
+    "VideoThumbnailPreview",
+    "VIDEO_DIGEST_AVAILABLE",
+    "OPENCV_AVAILABLE",
+    "digest_cache_key",
+    "find_cached_thumbnails",
+    "thumbnail_cache_key",
+]
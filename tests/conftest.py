@@ -1,9 +1,20 @@
 """Pytest fixtures providing a lightweight qtbot replacement."""
 
+import shutil
+import sys
 import time
+from pathlib import Path
+
 import pytest
+from PySide6.QtCore import QEventLoop, QTimer
 from PySide6.QtWidgets import QApplication
-from PySide6.QtTest import QSignalSpy, QTest
+from PySide6.QtTest import QSignalSpy
+
+
+# Make ``src.file_manager`` importable no matter where pytest is started from.
+_REPO_ROOT = str(Path(__file__).resolve().parents[1])
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
 
 
 class _SimpleQtBot:
@@ -26,15 +37,30 @@ class _SimpleQtBot:
             raise AssertionError("Signal was not emitted within timeout")
         return spy
 
-    def waitUntil(self, condition, timeout: int = 1000, interval: int = 50):
+    def waitUntil(self, condition, timeout: int = 1000, interval: int = 5):
         """Wait until condition returns True, processing events meanwhile."""
+        if condition():
+            return
         deadline = time.monotonic() + timeout / 1000.0
-        while time.monotonic() < deadline:
+        met = False
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.setInterval(interval)
+
+        def tick():
+            nonlocal met
             if condition():
-                return
-            self._app.processEvents()
-            QTest.qWait(interval)
-        raise AssertionError("Condition was not met within timeout")
+                met = True
+                loop.quit()
+            elif time.monotonic() >= deadline:
+                loop.quit()
+
+        timer.timeout.connect(tick)
+        timer.start()
+        loop.exec()
+        timer.stop()
+        if not met:
+            raise AssertionError("Condition was not met within timeout")
 
     def _finalize(self) -> None:
         """Release widgets and finish pending events."""
@@ -48,15 +74,65 @@ class _SimpleQtBot:
         self._app.processEvents()
 
 
+def pytest_collection_modifyitems(config, items):
+    """Route qt_serial tests to a single xdist worker (pytest -n auto --dist loadgroup)."""
+    if not config.pluginmanager.hasplugin("xdist"):
+        return
+    for item in items:
+        if item.get_closest_marker("qt_serial"):
+            item.add_marker(pytest.mark.xdist_group("qt"))
+
+
+@pytest.fixture(scope="session")
+def qapp_args():
+    """Arguments for the session QApplication; the fusion style avoids loading platform styles."""
+    return ["file_manager_tests", "-style", "fusion"]
+
+
 @pytest.fixture(scope="session")
-def qapp():
+def qapp(qapp_args):
     """Ensure a QApplication exists for the entire test session."""
     app = QApplication.instance()
     if app is None:
-        app = QApplication([])
+        app = QApplication(qapp_args)
     yield app
 
 
+@pytest.fixture(scope="session")
+def similar_video_folder(tmp_path_factory):
+    """Folder with three similarly named videos, shared by the checkbox tests."""
+    folder = tmp_path_factory.mktemp("similar")
+    for name, size in [("video_01.mp4", 1000), ("video_02.mp4", 1010), ("video_03.mp4", 1020)]:
+        (folder / name).write_bytes(b"0" * size)
+    return str(folder)
+
+
+# Throwaway test databases need neither fsyncs nor an on-disk journal.
+TEST_SQLITE_PRAGMAS = ("synchronous=OFF", "journal_mode=MEMORY", "temp_store=MEMORY")
+
+
+@pytest.fixture(scope="session")
+def empty_index_template(tmp_path_factory):
+    """Empty search index database with the schema already created, built once per session."""
+    from src.file_manager.file_search import FileSearchIndex
+
+    template = tmp_path_factory.mktemp("tpl") / "tpl.db"
+    FileSearchIndex(index_db_path=str(template))
+    return template
+
+
+@pytest.fixture
+def fresh_index(tmp_path, empty_index_template):
+    """FileSearchIndex backed by a per-test copy of the empty template database."""
+    from src.file_manager.file_search import FileSearchIndex
+
+    db_path = tmp_path / "index.db"
+    shutil.copyfile(empty_index_template, db_path)
+    index = FileSearchIndex(index_db_path=str(db_path))
+    index.connection_pragmas = TEST_SQLITE_PRAGMAS
+    return index
+
+
 @pytest.fixture
 def qtbot(qapp, request):
     """Provide a simple qtbot compatible helper."""
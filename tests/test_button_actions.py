@@ -11,6 +11,8 @@ from PySide6.QtWidgets import QDialog
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 import file_manager.file_manager as fm
 
+pytestmark = pytest.mark.qt_serial
+
 
 @pytest.fixture
 def make_widget(qtbot):
@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 """チェックボックスの詳細なテスト"""
 
-import tempfile
 from pathlib import Path
 
 import pytest
@@ -12,25 +11,17 @@ from PySide6.QtCore import Qt
 from src.file_manager.filename_similarity import SimilarFileGroup
 from src.file_manager.filename_similarity_dialog import FilenameSimilarityDialog
 
+pytestmark = pytest.mark.qt_serial
 
-@pytest.fixture
-def test_folder():
-    """テストフォルダを作成"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        files = ["video_01.mp4", "video_02.mp4"]
-        for filename in files:
-            (Path(tmpdir) / filename).write_bytes(b"test")
-        yield tmpdir
 
-
-def test_checkbox_flags_and_state(qtbot: QtBot, test_folder):
+def test_checkbox_flags_and_state(qtbot: QtBot, similar_video_folder):
     """チェックボックスのフラグと状態の詳細確認"""
-    dialog = FilenameSimilarityDialog(test_folder)
+    dialog = FilenameSimilarityDialog(similar_video_folder)
     qtbot.addWidget(dialog)
 
     # テストグループ
-    file1 = str(Path(test_folder) / "video_01.mp4")
-    file2 = str(Path(test_folder) / "video_02.mp4")
+    file1 = str(Path(similar_video_folder) / "video_01.mp4")
+    file2 = str(Path(similar_video_folder) / "video_02.mp4")
 
     test_groups = [
         SimilarFileGroup(
@@ -80,12 +71,12 @@ def test_checkbox_flags_and_state(qtbot: QtBot, test_folder):
         print(f"  FilePath: {file_path}")
 
 
-def test_checkbox_click_behavior(qtbot: QtBot, test_folder):
+def test_checkbox_click_behavior(qtbot: QtBot, similar_video_folder):
     """チェックボックスのクリック動作テスト"""
-    dialog = FilenameSimilarityDialog(test_folder)
+    dialog = FilenameSimilarityDialog(similar_video_folder)
     qtbot.addWidget(dialog)
 
-    file1 = str(Path(test_folder) / "video_01.mp4")
+    file1 = str(Path(similar_video_folder) / "video_01.mp4")
     test_groups = [
         SimilarFileGroup(
             representative_name="video_01.mp4",
@@ -120,12 +111,12 @@ def test_checkbox_click_behavior(qtbot: QtBot, test_folder):
     assert file1 in dialog.checked_files, "チェックされたファイルが追跡されていない"
 
 
-def test_visual_checkbox_elements(qtbot: QtBot, test_folder):
+def test_visual_checkbox_elements(qtbot: QtBot, similar_video_folder):
     """チェックボックスの視覚要素テスト"""
-    dialog = FilenameSimilarityDialog(test_folder)
+    dialog = FilenameSimilarityDialog(similar_video_folder)
     qtbot.addWidget(dialog)
 
-    file1 = str(Path(test_folder) / "video_01.mp4")
+    file1 = str(Path(similar_video_folder) / "video_01.mp4")
     test_groups = [
         SimilarFileGroup(
             representative_name="video_01.mp4",
@@ -2,82 +2,113 @@
 # -*- coding: utf-8 -*-
 """チェックボックス機能のテスト"""
 
-import tempfile
 from pathlib import Path
 
 import pytest
 from pytestqt.qtbot import QtBot
-from PySide6.QtCore import Qt, QCoreApplication
+from PySide6.QtCore import Qt
 
 from src.file_manager.filename_similarity import SimilarFileGroup
 from src.file_manager.filename_similarity_dialog import FilenameSimilarityDialog
 
+pytestmark = pytest.mark.qt_serial
+
+
+def _drain(qtbot: QtBot, predicate, timeout: int = 100) -> None:
+    """条件が満たされるまでだけイベントを処理する（満たされていれば即座に戻る）"""
+    qtbot.waitUntil(predicate, timeout=timeout)
+
+
+@pytest.fixture(scope="class")
+def shared_dialog(qapp, similar_video_folder):
+    """クラス内のテストで使い回すダイアログ（ウィジェットの構築は1回だけ）"""
+    dialog = FilenameSimilarityDialog(similar_video_folder)
+    yield dialog
+    dialog.close()
+    dialog.deleteLater()
+    qapp.processEvents()
+
 
 @pytest.fixture
-def test_folder_with_similar_files():
-    """類似ファイルを含むテストフォルダを作成"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # 類似する動画ファイルを作成
-        files = ["video_01.mp4", "video_02.mp4", "video_03.mp4"]
-        for filename in files:
-            (Path(tmpdir) / filename).write_bytes(b"test content")
-        yield tmpdir
+def dialog(shared_dialog):
+    """共有ダイアログを生成直後と同じ状態に戻して渡す"""
+    shared_dialog.blockSignals(True)
+    shared_dialog.tree.clear()
+    shared_dialog.blockSignals(False)
+    shared_dialog.checked_files.clear()
+    shared_dialog._update_selection_label()
+    shared_dialog.delete_button.setEnabled(False)
+    shared_dialog.select_all_button.setEnabled(False)
+    shared_dialog.deselect_all_button.setEnabled(False)
+    return shared_dialog
+
+
+def _one_file_group(folder):
+    """video_01.mp4 だけを含む類似グループ1つのリスト"""
+    file_path = str(Path(folder) / "video_01.mp4")
+    return [
+        SimilarFileGroup(
+            representative_name="video_01.mp4",
+            files=[file_path],
+            similarity_score=1.0,
+            file_sizes={file_path: 1000},
+        )
+    ]
+
+
+def _two_file_group(folder):
+    """2ファイルからなる類似グループ1つのリスト"""
+    file1 = str(Path(folder) / "video_01.mp4")
+    file2 = str(Path(folder) / "video_02.mp4")
+    return [
+        SimilarFileGroup(
+            representative_name="video_01.mp4",
+            files=[file1, file2],
+            similarity_score=0.95,
+            file_sizes={file1: 1000, file2: 1100},
+        )
+    ]
 
 
 class TestCheckboxFunctionality:
     """チェックボックス機能のテスト"""
 
-    def test_checkbox_appears_in_tree(self, qtbot: QtBot, test_folder_with_similar_files):
-        """ツリーにチェックボックスが表示されるか"""
-        dialog = FilenameSimilarityDialog(test_folder_with_similar_files)
-        qtbot.addWidget(dialog)
-
-        # テスト用のグループを作成
-        test_groups = [
-            SimilarFileGroup(
-                representative_name="video_01.mp4",
-                files=[
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"),
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"),
-                ],
-                similarity_score=0.95,
-                file_sizes={
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"): 1000,
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"): 1100,
-                },
-            )
-        ]
-
-        dialog._populate_tree(test_groups)
+    @pytest.mark.parametrize(
+        ("actions", "expected_state", "expected_checked"),
+        [
+            ((), Qt.Unchecked, 0),  # 初期状態はチェックなし
+            (("_select_all",), Qt.Checked, 2),
+            (("_select_all", "_deselect_all"), Qt.Unchecked, 0),
+        ],
+        ids=["appears_in_tree", "select_all", "deselect_all"],
+    )
+    def test_check_state_after_action(
+        self, qtbot: QtBot, dialog, similar_video_folder, actions, expected_state, expected_checked
+    ):
+        """ツリーにチェックボックスが表示され、すべて選択/解除が反映されるか"""
+        dialog._populate_tree(_two_file_group(similar_video_folder))
+        dialog.select_all_button.setEnabled(True)
+        dialog.deselect_all_button.setEnabled(True)
 
         # ツリーアイテムを取得
         top_item = dialog.tree.topLevelItem(0)
         assert top_item is not None
         assert top_item.childCount() == 2
 
+        for action in actions:
+            getattr(dialog, action)()
+        _drain(qtbot, lambda: len(dialog.checked_files) == expected_checked)
+
         # 子アイテム（ファイル）を確認
         for i in range(top_item.childCount()):
             child = top_item.child(i)
             # チェックボックスが有効か確認
             assert child.flags() & Qt.ItemIsUserCheckable
-            # 初期状態はチェックなし
-            assert child.checkState(0) == Qt.Unchecked
+            assert child.checkState(0) == expected_state
 
-    def test_checkbox_state_changes(self, qtbot: QtBot, test_folder_with_similar_files):
+    def test_checkbox_state_changes(self, qtbot: QtBot, dialog, similar_video_folder):
         """チェックボックスの状態が変更できるか"""
-        dialog = FilenameSimilarityDialog(test_folder_with_similar_files)
-        qtbot.addWidget(dialog)
-
-        test_groups = [
-            SimilarFileGroup(
-                representative_name="video_01.mp4",
-                files=[str(Path(test_folder_with_similar_files) / "video_01.mp4")],
-                similarity_score=1.0,
-                file_sizes={str(Path(test_folder_with_similar_files) / "video_01.mp4"): 1000},
-            )
-        ]
-
-        dialog._populate_tree(test_groups)
+        dialog._populate_tree(_one_file_group(similar_video_folder))
 
         top_item = dialog.tree.topLevelItem(0)
         child = top_item.child(0)
@@ -90,22 +121,10 @@ class TestCheckboxFunctionality:
         child.setCheckState(0, Qt.Unchecked)
         assert child.checkState(0) == Qt.Unchecked
 
-    def test_checked_files_tracking(self, qtbot: QtBot, test_folder_with_similar_files):
+    def test_checked_files_tracking(self, qtbot: QtBot, dialog, similar_video_folder):
         """チェックされたファイルが追跡されるか"""
-        dialog = FilenameSimilarityDialog(test_folder_with_similar_files)
-        qtbot.addWidget(dialog)
-
-        file_path = str(Path(test_folder_with_similar_files) / "video_01.mp4")
-        test_groups = [
-            SimilarFileGroup(
-                representative_name="video_01.mp4",
-                files=[file_path],
-                similarity_score=1.0,
-                file_sizes={file_path: 1000},
-            )
-        ]
-
-        dialog._populate_tree(test_groups)
+        file_path = str(Path(similar_video_folder) / "video_01.mp4")
+        dialog._populate_tree(_one_file_group(similar_video_folder))
 
         top_item = dialog.tree.topLevelItem(0)
         child = top_item.child(0)
@@ -116,100 +135,17 @@ class TestCheckboxFunctionality:
 
         # チェックを入れる
         child.setCheckState(0, Qt.Checked)
-        # itemChanged シグナルが発火するまで待機
-        QCoreApplication.processEvents()
+        # itemChanged シグナルが処理されるまで待機
+        _drain(qtbot, lambda: file_path in dialog.checked_files)
 
         # チェックされたファイルが追跡される
         assert file_path in dialog.checked_files
         assert len(dialog.checked_files) == 1
 
-    def test_select_all_functionality(self, qtbot: QtBot, test_folder_with_similar_files):
-        """すべて選択機能のテスト"""
-        dialog = FilenameSimilarityDialog(test_folder_with_similar_files)
-        qtbot.addWidget(dialog)
-
-        test_groups = [
-            SimilarFileGroup(
-                representative_name="video_01.mp4",
-                files=[
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"),
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"),
-                ],
-                similarity_score=0.95,
-                file_sizes={
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"): 1000,
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"): 1100,
-                },
-            )
-        ]
-
-        dialog._populate_tree(test_groups)
-        dialog.select_all_button.setEnabled(True)
-
-        # すべて選択を実行
-        dialog._select_all()
-        QCoreApplication.processEvents()
-
-        # すべてのファイルがチェックされている
-        top_item = dialog.tree.topLevelItem(0)
-        for i in range(top_item.childCount()):
-            child = top_item.child(i)
-            assert child.checkState(0) == Qt.Checked
-
-    def test_deselect_all_functionality(self, qtbot: QtBot, test_folder_with_similar_files):
-        """すべて解除機能のテスト"""
-        dialog = FilenameSimilarityDialog(test_folder_with_similar_files)
-        qtbot.addWidget(dialog)
-
-        test_groups = [
-            SimilarFileGroup(
-                representative_name="video_01.mp4",
-                files=[
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"),
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"),
-                ],
-                similarity_score=0.95,
-                file_sizes={
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"): 1000,
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"): 1100,
-                },
-            )
-        ]
-
-        dialog._populate_tree(test_groups)
-        dialog.select_all_button.setEnabled(True)
-        dialog.deselect_all_button.setEnabled(True)
-
-        # まずすべて選択
-        dialog._select_all()
-        QCoreApplication.processEvents()
-
-        # すべて解除
-        dialog._deselect_all()
-        QCoreApplication.processEvents()
-
-        # すべてのファイルのチェックが外れている
-        top_item = dialog.tree.topLevelItem(0)
-        for i in range(top_item.childCount()):
-            child = top_item.child(i)
-            assert child.checkState(0) == Qt.Unchecked
-
-    def test_delete_button_enables_when_checked(self, qtbot: QtBot, test_folder_with_similar_files):
+    def test_delete_button_enables_when_checked(self, qtbot: QtBot, dialog, similar_video_folder):
         """ファイルをチェックすると削除ボタンが有効になるか"""
-        dialog = FilenameSimilarityDialog(test_folder_with_similar_files)
-        qtbot.addWidget(dialog)
-
-        file_path = str(Path(test_folder_with_similar_files) / "video_01.mp4")
-        test_groups = [
-            SimilarFileGroup(
-                representative_name="video_01.mp4",
-                files=[file_path],
-                similarity_score=1.0,
-                file_sizes={file_path: 1000},
-            )
-        ]
-
-        dialog._populate_tree(test_groups)
+        file_path = str(Path(similar_video_folder) / "video_01.mp4")
+        dialog._populate_tree(_one_file_group(similar_video_folder))
 
         # 初期状態: 削除ボタンは無効
         assert not dialog.delete_button.isEnabled()
@@ -218,7 +154,7 @@ class TestCheckboxFunctionality:
         top_item = dialog.tree.topLevelItem(0)
         child = top_item.child(0)
         child.setCheckState(0, Qt.Checked)
-        QCoreApplication.processEvents()
+        _drain(qtbot, dialog.delete_button.isEnabled)
 
         # 削除ボタンが有効になる
         assert dialog.delete_button.isEnabled()
@@ -7,7 +7,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from file_manager.disk_analyzer import DiskAnalyzer
 
+pytestmark = pytest.mark.qt_serial
 
+
+@pytest.mark.slow
 def test_disk_analyzer_emits_progress(qtbot, tmp_path):
     root = tmp_path / "root"
     nested = root / "nested"
@@ -31,3 +34,27 @@ def test_disk_analyzer_emits_progress(qtbot, tmp_path):
     assert progress_values[-1] == 100
     assert any(0 < value < 100 for value in progress_values), "intermediate progress expected"
 
+
+
+def test_folder_sizes_include_files_below_max_depth(qtbot, tmp_path):
+    root = tmp_path / "root"
+    deep = root / "a" / "b" / "c" / "d" / "e"
+    deep.mkdir(parents=True)
+    (root / "a" / "top.bin").write_bytes(b"t" * 10)
+    (deep / "deep.bin").write_bytes(b"d" * 100)
+
+    analyzer = DiskAnalyzer()
+    analyzer.max_depth = 2
+    results = []
+    analyzer.analysis_completed.connect(results.append)
+
+    analyzer.analyze_directory(str(root))
+
+    (folder_a,) = results[0]
+    assert folder_a["size"] == 110
+    folder_b = next(item for item in folder_a["children"] if item["name"] == "b")
+    assert folder_b["size"] == 100
+    folder_c = folder_b["children"][0]
+    # max_depth を超えた階層は一覧に出さないがサイズには含める
+    assert folder_c["size"] == 100
+    assert folder_c["children"] == []
@@ -3,7 +3,6 @@ import sys
 import importlib
 import types
 import pytest
-from unittest.mock import MagicMock
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
@@ -11,6 +10,8 @@ from file_manager import video_digest
 from file_manager.file_manager import SettingsDialog, FileManagerWidget, CustomFileSystemModel
 from PySide6.QtCore import QSettings, Qt
 
+pytestmark = pytest.mark.qt_serial
+
 
 def test_video_digest_fallback_emits_digest(qtbot, tmp_path):
     """OpenCVが無い環境でもプレースホルダーを返してdigest_generatedを発行する"""
@@ -74,38 +75,57 @@ def test_settings_accept_does_not_crash(qtbot, monkeypatch):
     assert called.get('invoked')
 
 
-def test_search_button_dynamic_import(qtbot, monkeypatch):
+class _FakeDialog:
+    """Stand-in for FileSearchDialog that only counts exec() calls."""
+
+    def __init__(self):
+        self.exec_calls = 0
+
+    def exec(self):
+        self.exec_calls += 1
+
+
+@pytest.fixture(scope="module")
+def file_manager_widget(qapp):
+    """FileManagerWidget shared by the tests in this module (built and torn down once)."""
+    widget = FileManagerWidget()
+    yield widget
+    widget.close()
+    widget.deleteLater()
+    qapp.processEvents()
+
+
+def test_search_button_dynamic_import(qtbot, monkeypatch, file_manager_widget):
     """Clicking the toolbar search button should attempt to load the dialog dynamically and call exec"
     """
     # create a fake module object and insert into sys.modules
     mod = types.ModuleType('file_manager.file_search_dialog')
-    fake_dialog = MagicMock()
-    fake_dialog.exec = MagicMock()
+    fake_dialog = _FakeDialog()
     # Dialog constructor returns an object with exec
     mod.FileSearchDialog = lambda parent=None: fake_dialog
     sys.modules['file_manager.file_search_dialog'] = mod
 
-    widget = FileManagerWidget()
+    widget = file_manager_widget
     # click toolbar search button
     widget.search_button.click()
 
     # ensure exec() was called on our fake dialog
-    fake_dialog.exec.assert_called_once()
+    assert fake_dialog.exec_calls == 1
 
     # cleanup
     del sys.modules['file_manager.file_search_dialog']
 
 def test_attribute_column_uses_default_background(qtbot, tmp_path):
-    """属性列の背景色が交互色に干渉しないことを確認"""
+    """属性列などカスタム列の背景色が交互色に干渉しないことを確認"""
     sample_file = tmp_path / 'sample.txt'
     sample_file.write_text('dummy')
     model = CustomFileSystemModel()
-    model.setRootPath(str(tmp_path))
-    root_index = model.index(str(tmp_path))
-    qtbot.waitUntil(lambda: model.rowCount(root_index) >= 1, timeout=2000)
+    # パスを指定した index() はノードをその場で作るため、監視スレッドの読み込みを待たなくてよい
     item_index = model.index(str(sample_file))
     assert item_index.isValid()
-    attr_index = model.index(item_index.row(), 6, item_index.parent())
-    assert attr_index.isValid()
-    assert model.data(attr_index, Qt.BackgroundRole) is None
-
+    for column in range(4, model.columnCount()):
+        index = model.index(item_index.row(), column, item_index.parent())
+        assert index.isValid()
+        assert model.data(index, Qt.BackgroundRole) is None
+    # カスタム列の表示値は返されている（data() がカスタム列を処理している）
+    assert model.data(model.index(item_index.row(), 7, item_index.parent()), Qt.DisplayRole) == 'txt'
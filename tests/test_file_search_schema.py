@@ -1,20 +1,18 @@
-﻿import sys
-import importlib.util
-import sqlite3
-from pathlib import Path
+﻿import sqlite3
 
-ROOT = Path(__file__).resolve().parents[1] / "src" / "file_manager"
-FILE_SEARCH_PATH = ROOT / "file_search.py"
-FILE_SEARCH_SPEC = importlib.util.spec_from_file_location("file_manager_file_search", FILE_SEARCH_PATH)
-file_search = importlib.util.module_from_spec(FILE_SEARCH_SPEC)
-sys.modules[FILE_SEARCH_SPEC.name] = file_search
-FILE_SEARCH_SPEC.loader.exec_module(file_search)
-FileSearchIndex = file_search.FileSearchIndex
 
+def _connect(db_path):
+    """Open a test connection without fsyncs or an on-disk journal."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.executescript(
+        "PRAGMA synchronous=OFF; PRAGMA journal_mode=MEMORY; PRAGMA temp_store=MEMORY;"
+    )
+    return conn
 
-def test_file_index_schema_has_directory_and_hash(tmp_path):
-    db_path = tmp_path / "index.db"
-    index = FileSearchIndex(index_db_path=str(db_path))
+
+def test_file_index_schema_has_directory_and_hash(tmp_path, fresh_index):
+    db_path = fresh_index.index_db_path
+    index = fresh_index
 
     sample_dir = tmp_path / "data"
     sample_dir.mkdir()
@@ -23,7 +21,7 @@ def test_file_index_schema_has_directory_and_hash(tmp_path):
 
     index.update_index_for_directory(str(sample_dir))
 
-    conn = sqlite3.connect(db_path)
+    conn = _connect(db_path)
     try:
         columns = {row[1] for row in conn.execute("PRAGMA table_info(files)")}
         assert "directory" in columns
@@ -39,7 +37,3 @@ def test_file_index_schema_has_directory_and_hash(tmp_path):
         assert content_hash is None
     finally:
         conn.close()
-
-
-
-
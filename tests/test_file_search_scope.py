@@ -1,16 +1,10 @@
-﻿import os
-import sys
-from pathlib import Path
+﻿from pathlib import Path
 
 import pytest
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
-
-from file_manager.file_search import FileSearchIndex
-
 
 @pytest.mark.parametrize("query", ["report", "REPORT"])
-def test_search_files_scoped_results(tmp_path, query):
+def test_search_files_scoped_results(tmp_path, fresh_index, query):
     root = tmp_path / "root"
     sub_a = root / "project_a"
     sub_b = root / "project_b"
@@ -22,8 +16,7 @@ def test_search_files_scoped_results(tmp_path, query):
     target_in_a.write_text("alpha", encoding="utf-8")
     target_in_b.write_text("beta", encoding="utf-8")
 
-    index_path = tmp_path / "index.db"
-    search_index = FileSearchIndex(index_db_path=str(index_path))
+    search_index = fresh_index
     search_index.update_index_for_directory(str(root))
 
     scoped_results = search_index.search_files(
@@ -2,9 +2,8 @@
 # -*- coding: utf-8 -*-
 """ファイル名類似度ダイアログのテスト"""
 
-import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import Mock, patch
 
 import pytest
 from pytestqt.qtbot import QtBot
@@ -17,6 +16,8 @@ from src.file_manager.filename_similarity_dialog import (
     FilenameSimilarityWorker,
 )
 
+pytestmark = pytest.mark.qt_serial
+
 
 class TestFilenameSimilarityWorker:
     """FilenameSimilarityWorker のテスト"""
@@ -38,15 +39,15 @@ class TestFilenameSimilarityWorker:
         assert worker._cancelled is True
 
 
-@pytest.fixture
-def test_folder_with_similar_files():
-    """類似ファイルを含むテストフォルダを作成"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # 類似する動画ファイルを作成
-        files = ["video_01.mp4", "video_02.mp4", "video_03.mp4", "other.avi"]
-        for filename in files:
-            (Path(tmpdir) / filename).touch()
-        yield tmpdir
+@pytest.fixture(scope="module")
+def test_folder_with_similar_files(tmp_path_factory):
+    """類似ファイルを含むテストフォルダを作成（テストは中身を変更しないのでモジュールで共有）"""
+    tmpdir = tmp_path_factory.mktemp("similar_dialog")
+    # 類似する動画ファイルを作成
+    files = ["video_01.mp4", "video_02.mp4", "video_03.mp4", "other.avi"]
+    for filename in files:
+        (tmpdir / filename).touch()
+    return str(tmpdir)
 
 
 class TestFilenameSimilarityDialog:
@@ -101,18 +102,15 @@ class TestFilenameSimilarityDialog:
         qtbot.addWidget(dialog)
 
         # テスト用のダミー結果
+        base = Path(test_folder_with_similar_files)
+        p1 = str(base / "video_01.mp4")
+        p2 = str(base / "video_02.mp4")
         test_groups = [
             SimilarFileGroup(
                 representative_name="video_01.mp4",
-                files=[
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"),
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"),
-                ],
+                files=[p1, p2],
                 similarity_score=0.95,
-                file_sizes={
-                    str(Path(test_folder_with_similar_files) / "video_01.mp4"): 1000,
-                    str(Path(test_folder_with_similar_files) / "video_02.mp4"): 1100,
-                },
+                file_sizes={p1: 1000, p2: 1100},
             )
         ]
 
@@ -131,7 +129,8 @@ class TestFilenameSimilarityDialog:
         qtbot.addWidget(dialog)
 
         # 相対パス変換のテスト
-        full_path = str(Path(test_folder_with_similar_files) / "subdir" / "file.mp4")
+        base = Path(test_folder_with_similar_files)
+        full_path = str(base / "subdir" / "file.mp4")
         relative = dialog._to_relative_path(full_path)
         assert "subdir" in relative or relative == full_path
 
@@ -181,8 +180,8 @@ class TestFilenameSimilarityDialog:
         qtbot.addWidget(dialog)
 
         # ワーカーをモック
-        mock_worker = MagicMock()
-        mock_thread = MagicMock()
+        mock_worker = Mock(spec=FilenameSimilarityWorker)
+        mock_thread = Mock(spec=["quit", "wait", "deleteLater"])
         dialog.worker = mock_worker
         dialog.worker_thread = mock_thread
 
@@ -1,25 +1,10 @@
-﻿import importlib.util
-import json
-import sys
+﻿import json
 from dataclasses import is_dataclass
-from pathlib import Path
 
 import pytest
 
-ROOT = Path(__file__).resolve().parents[1] / "src" / "file_manager"
-
-MODELS_PATH = ROOT / "models.py"
-MODELS_SPEC = importlib.util.spec_from_file_location("file_manager_models", MODELS_PATH)
-models = importlib.util.module_from_spec(MODELS_SPEC)
-sys.modules[MODELS_SPEC.name] = models
-MODELS_SPEC.loader.exec_module(models)
-
-APP_PREF_PATH = ROOT / "app_preferences.py"
-APP_PREF_SPEC = importlib.util.spec_from_file_location("file_manager_app_preferences", APP_PREF_PATH)
-app_preferences = importlib.util.module_from_spec(APP_PREF_SPEC)
-sys.modules[APP_PREF_SPEC.name] = app_preferences
-APP_PREF_SPEC.loader.exec_module(app_preferences)
-AppPreference = app_preferences.AppPreference
+from src.file_manager import models
+from src.file_manager.app_preferences import AppPreference
 
 
 def test_search_query_normalization():
@@ -13,6 +13,8 @@ from unittest.mock import patch, MagicMock
 # テスト対象のモジュールをインポート
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+pytestmark = pytest.mark.qt_serial
+
 def test_settings_keys_consistency():
     """設定キーの一貫性テスト"""
     # 期待される設定キー
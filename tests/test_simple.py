@@ -12,6 +12,8 @@ import pytest
 # テスト対象のモジュールをインポート
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+pytestmark = pytest.mark.qt_serial
+
 def test_simple():
     """簡単なテスト"""
     assert 1 + 1 == 2
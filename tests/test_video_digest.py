@@ -1,5 +1,24 @@
-﻿import file_manager.video_digest as vd
-from PySide6.QtGui import QPixmap
+﻿import os
+import threading
+
+import file_manager.video_digest as vd
+import numpy as np
+import pytest
+from PySide6.QtGui import QColor, QImage, QPixmap
+
+pytestmark = pytest.mark.qt_serial
+
+
+def _write_sample_video(path, frame_count=60, size=(64, 48)):
+    """フレームごとに明るさが変わる短い動画を作成（作成できなければスキップ）"""
+    cv2 = pytest.importorskip("cv2")
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 25, size)
+    if not writer.isOpened():
+        pytest.skip("mp4v encoder is not available")
+    for index in range(frame_count):
+        writer.write(np.full((size[1], size[0], 3), index * 4, dtype=np.uint8))
+    writer.release()
+    return path
 
 
 def test_video_digest_generator_fallback_without_opencv(qtbot, monkeypatch, tmp_path):
@@ -18,7 +37,7 @@ def test_video_digest_generator_fallback_without_opencv(qtbot, monkeypatch, tmp_
     emitted_path, thumbnails = results[0]
     assert emitted_path == str(video_path)
     assert len(thumbnails) == 3
-    assert all(isinstance(pix, QPixmap) and not pix.isNull() for pix in thumbnails)
+    assert all(isinstance(pix, QImage) and not pix.isNull() for pix in thumbnails)
 
 
 def test_video_digest_worker_emits_results_without_opencv(monkeypatch, tmp_path):
@@ -37,4 +56,256 @@ def test_video_digest_worker_emits_results_without_opencv(monkeypatch, tmp_path)
     emitted_path, thumbnails = results[0]
     assert emitted_path == str(video_path)
     assert len(thumbnails) == 2
-    assert all(isinstance(pix, QPixmap) and not pix.isNull() for pix in thumbnails)
+    assert all(isinstance(pix, QImage) and not pix.isNull() for pix in thumbnails)
+
+
+def _sample_features(path):
+    """キャッシュの保存・読み込みを確認するための小さな特徴量"""
+    rng = np.random.default_rng(0)
+    return vd.VideoFeatures(
+        path=str(path),
+        thumbnail_positions=[0.25, 0.75],
+        frame_histograms=rng.random((2, 8), dtype=np.float32),
+        frame_features=rng.random((2, 16), dtype=np.float32),
+        average_color=np.array([1.0, 2.0, 3.0], dtype=np.float32),
+        duration=12.5,
+        resolution=(64, 48),
+        fps=25.0,
+        file_size=5,
+    )
+
+
+def _white_images(count, size=(32, 18)):
+    images = []
+    for _ in range(count):
+        image = QImage(size[0], size[1], vd.THUMBNAIL_FORMAT)
+        image.fill(QColor(10, 20, 30))
+        images.append(image)
+    return images
+
+
+def test_video_digest_generator_uses_disk_cache(monkeypatch, tmp_path):
+    video_path = tmp_path / "cached.mp4"
+    video_path.write_bytes(b"dummy")
+
+    monkeypatch.setattr(vd, "OPENCV_AVAILABLE", True, raising=False)
+
+    generator = vd.VideoDigestGenerator()
+    monkeypatch.setattr(generator, "_cache_root", lambda: tmp_path / "cache")
+
+    cache_dir = generator._cache_dir(str(video_path), 2, (32, 18))
+    saved = _sample_features(video_path)
+    generator._save_cached_digest(cache_dir, _white_images(2), saved)
+    assert cache_dir.is_dir()
+
+    def fail_extract(*args, **kwargs):
+        raise AssertionError("キャッシュがあるのにデコードが実行されました")
+
+    monkeypatch.setattr(vd, "extract_video_features", fail_extract)
+
+    results = []
+    generator.digest_generated.connect(lambda path, thumbs: results.append((path, thumbs)))
+    features = generator.generate_digest(str(video_path), max_thumbnails=2, thumbnail_size=(32, 18))
+
+    assert results
+    emitted_path, thumbnails = results[0]
+    assert emitted_path == str(video_path)
+    assert len(thumbnails) == 2
+    # PNGで保存するので画素値は劣化しない
+    assert all(image.pixelColor(5, 5).getRgb() == (10, 20, 30, 255) for image in thumbnails)
+    # キャッシュからでも生成時と同じく特徴量を返す
+    assert features is not None
+    assert features.thumbnail_positions == saved.thumbnail_positions
+    assert features.resolution == saved.resolution
+    np.testing.assert_array_equal(features.frame_histograms, saved.frame_histograms)
+    assert features.similarity_score(saved) == saved.similarity_score(saved)
+
+
+def test_concurrent_cache_writes_do_not_collide(monkeypatch, tmp_path):
+    video_path = tmp_path / "shared.mp4"
+    video_path.write_bytes(b"dummy")
+    generator = vd.VideoDigestGenerator()
+    monkeypatch.setattr(generator, "_cache_root", lambda: tmp_path / "cache")
+    cache_dir = generator._cache_dir(str(video_path), 2, (32, 18))
+    features = _sample_features(video_path)
+
+    # 同じ動画のキャッシュを複数スレッドから同時に保存しても、一時ディレクトリは共有されない
+    threads = [
+        threading.Thread(target=generator._save_cached_digest, args=(cache_dir, _white_images(2), features))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert generator._load_cached_digest(cache_dir) is not None
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == [cache_dir.name]
+
+
+def test_video_digest_cache_evicts_least_recently_used(monkeypatch, tmp_path):
+    generator = vd.VideoDigestGenerator()
+    monkeypatch.setattr(generator, "_cache_root", lambda: tmp_path / "cache")
+
+    cache_dirs = []
+    for index in range(3):
+        video_path = tmp_path / f"video_{index}.mp4"
+        video_path.write_bytes(b"dummy")
+        cache_dir = generator._cache_dir(str(video_path), 1, (32, 18))
+        generator._save_cached_digest(cache_dir, _white_images(1), _sample_features(video_path))
+        os.utime(cache_dir, (index, index))
+        cache_dirs.append(cache_dir)
+
+    # 最も古い video_0 を読み込むと最近使ったものとして扱われる
+    assert generator._load_cached_digest(cache_dirs[0]) is not None
+
+    # 2件分の容量に制限すると、最後に使われたのが最も古い video_1 だけが削除される
+    generator.cache_max_bytes = vd._directory_size(cache_dirs[0]) * 2
+    generator._prune_cache(tmp_path / "cache")
+
+    assert [d.is_dir() for d in cache_dirs] == [True, False, True]
+
+
+def test_video_digest_cache_key_changes_with_settings(monkeypatch, tmp_path):
+    video_path = tmp_path / "key.mp4"
+    video_path.write_bytes(b"dummy")
+
+    generator = vd.VideoDigestGenerator()
+    monkeypatch.setattr(generator, "_cache_root", lambda: tmp_path / "cache")
+
+    base = generator._cache_dir(str(video_path), 6, (160, 90))
+    assert base == generator._cache_dir(str(video_path), 6, (160, 90))
+    assert base != generator._cache_dir(str(video_path), 3, (160, 90))
+    assert base != generator._cache_dir(str(video_path), 6, (320, 180))
+
+    generator.cache_enabled = False
+    assert generator._cache_dir(str(video_path), 6, (160, 90)) is None
+
+
+def test_composite_letterbox_pads_with_background():
+    dst = np.zeros((6, 8, 3), dtype=np.uint8)
+    src = np.full((4, 4, 3), 7, dtype=np.uint8)
+
+    vd.composite_letterbox(dst, src, 2, 1)
+
+    assert (dst[1:5, 2:6] == 7).all()
+    mask = np.ones(dst.shape[:2], dtype=bool)
+    mask[1:5, 2:6] = False
+    assert (dst[mask] == 255).all()
+
+
+def test_throttled_progress_skips_small_steps():
+    generator = vd.VideoDigestGenerator()
+    emitted = []
+    generator.progress_updated.connect(emitted.append)
+
+    emit = generator._throttled_progress(min_step=2)
+    for value in (0, 1, 2, 3, 50, 51, 100, 100):
+        emit(value)
+
+    assert emitted == [0, 2, 50, 100]
+
+
+def test_video_digest_workers_share_thread_generator(monkeypatch, tmp_path):
+    video_path = tmp_path / "shared.mp4"
+    video_path.write_bytes(b"dummy")
+
+    monkeypatch.setattr(vd, "OPENCV_AVAILABLE", False, raising=False)
+
+    first = vd.VideoDigestWorker(str(video_path), max_thumbnails=1, thumbnail_size=(16, 9))
+    second = vd.VideoDigestWorker(str(video_path), max_thumbnails=2, thumbnail_size=(16, 9))
+    first_results = []
+    second_results = []
+    first.digest_generated.connect(lambda path, thumbs: first_results.append(len(thumbs)))
+    second.digest_generated.connect(lambda path, thumbs: second_results.append(len(thumbs)))
+
+    first.run()
+    generator = vd._thread_generator()
+    second.run()
+
+    assert vd._thread_generator() is generator
+    assert first_results == [1]
+    assert second_results == [2]
+
+
+def test_video_digest_generator_builds_distinct_thumbnails(tmp_path):
+    video_path = _write_sample_video(tmp_path / "gradient.mp4")
+
+    generator = vd.VideoDigestGenerator()
+    generator.cache_enabled = False
+    results = []
+    generator.digest_generated.connect(lambda path, thumbs: results.append(thumbs))
+
+    generator.generate_digest(str(video_path), max_thumbnails=3, thumbnail_size=(32, 18))
+
+    assert results
+    thumbnails = results[0]
+    assert len(thumbnails) == 3
+    centers = [pix.pixelColor(16, 9).red() for pix in thumbnails]
+    assert centers == sorted(centers)
+    assert len(set(centers)) == 3
+    assert all(pix.format() == QImage.Format_RGB32 for pix in thumbnails)
+    # 余白（上下）は白、4バイト目は不透明のまま
+    assert thumbnails[0].pixelColor(0, 0).getRgb() == (255, 255, 255, 255)
+
+
+def test_single_thumbnail_skips_feature_extraction(monkeypatch, tmp_path):
+    video_path = _write_sample_video(tmp_path / "single.mp4")
+
+    def fail_extract(*args, **kwargs):
+        raise AssertionError("1枚モードで特徴量抽出が実行されました")
+
+    monkeypatch.setattr(vd, "extract_video_features", fail_extract)
+
+    generator = vd.VideoDigestGenerator()
+    generator.cache_enabled = False
+    results = []
+    generator.digest_generated.connect(lambda path, thumbs: results.append(thumbs))
+
+    features = generator.generate_digest(str(video_path), max_thumbnails=1, thumbnail_size=(32, 18))
+
+    assert results and len(results[0]) == 1
+    assert features is not None
+    assert features.thumbnail_positions == [vd.SINGLE_THUMBNAIL_POSITION]
+
+
+def test_video_digest_generator_streams_each_thumbnail(tmp_path):
+    video_path = _write_sample_video(tmp_path / "stream.mp4")
+
+    generator = vd.VideoDigestGenerator()
+    generator.cache_enabled = False
+    streamed = []
+    generator.thumbnail_ready.connect(lambda path, index, pixmap: streamed.append(index))
+
+    generator.generate_digest(str(video_path), max_thumbnails=3, thumbnail_size=(32, 18))
+
+    assert streamed == [0, 1, 2]
+
+
+def test_to_pixmap_converts_worker_images(qtbot):
+    image = QImage(8, 4, QImage.Format_RGB888)
+    image.fill(0)
+
+    pixmap = vd.to_pixmap(image)
+
+    assert isinstance(pixmap, QPixmap)
+    assert (pixmap.width(), pixmap.height()) == (8, 4)
+    assert vd.to_pixmap(pixmap) is pixmap
+
+
+def test_pack_thumbnails_round_trips_images(qtbot):
+    images = []
+    for value in (10, 200):
+        image = QImage(5, 3, QImage.Format_RGB32)
+        image.fill(QColor(value, 0, 255 - value))
+        images.append(image)
+    # 24bppの画像（1行15バイトで行末にパディングが入る）も変換して詰める
+    images.append(images[0].convertToFormat(QImage.Format_BGR888))
+
+    data, width, height = vd.pack_thumbnails(images)
+
+    assert (width, height) == (5, 3)
+    assert len(data) == 3 * 5 * 3 * 4
+    unpacked = vd.unpack_thumbnails(data, width, height)
+    assert [image.pixelColor(4, 2).red() for image in unpacked] == [10, 200, 10]
+    assert vd.pack_thumbnails([]) == (b"", 0, 0)
@@ -0,0 +1,142 @@
+import os
+import sys
+
+import types
+
+import pytest
+from PySide6.QtGui import QPixmap, QPixmapCache
+from PySide6.QtWidgets import QGraphicsPixmapItem
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from file_manager import video_digest_dialog
+from file_manager.video_digest_dialog import VideoDigestDialog
+from file_manager.video_thumbnail_preview import VideoThumbnailPreview
+
+pytestmark = pytest.mark.qt_serial
+
+
+def _make_dialog(monkeypatch, qtbot, tmp_path):
+    video_path = tmp_path / "dialog.mp4"
+    video_path.write_bytes(b"dummy")
+    # ワーカーを起動せずにダイアログだけを作成する
+    monkeypatch.setattr(VideoDigestDialog, "generate_digest", lambda self: None)
+    dialog = VideoDigestDialog(str(video_path))
+    qtbot.addWidget(dialog)
+    return dialog
+
+
+def test_display_thumbnails_places_items_on_scene(monkeypatch, qtbot, tmp_path):
+    dialog = _make_dialog(monkeypatch, qtbot, tmp_path)
+    pixmaps = []
+    for _ in range(4):
+        pixmap = QPixmap(*dialog.thumbnail_size)
+        pixmap.fill()
+        pixmaps.append(pixmap)
+
+    dialog.on_digest_generated(dialog.video_path, pixmaps)
+
+    items = [item for item in dialog.thumbnail_scene.items() if isinstance(item, QGraphicsPixmapItem)]
+    assert len(items) == 4
+    positions = sorted((item.pos().y(), item.pos().x()) for item in items)
+    assert positions[0] == (0.0, 0.0)
+    assert positions[3][0] > 0  # 4枚目は2行目に配置される
+    assert dialog.regenerate_button.isEnabled()
+
+
+def test_clear_thumbnails_shows_generating_message(monkeypatch, qtbot, tmp_path):
+    dialog = _make_dialog(monkeypatch, qtbot, tmp_path)
+    pixmap = QPixmap(*dialog.thumbnail_size)
+    pixmap.fill()
+    dialog.display_thumbnails([pixmap])
+
+    dialog.clear_thumbnails()
+
+    texts = [item.text() for item in dialog.thumbnail_scene.items() if hasattr(item, "text")]
+    assert texts == ["ダイジェストを生成中..."]
+
+
+def test_streamed_thumbnails_are_not_rebuilt_on_completion(monkeypatch, qtbot, tmp_path):
+    dialog = _make_dialog(monkeypatch, qtbot, tmp_path)
+    pixmaps = []
+    for index in range(2):
+        pixmap = QPixmap(*dialog.thumbnail_size)
+        pixmap.fill()
+        pixmaps.append(pixmap)
+        dialog.on_thumbnail_ready(dialog.video_path, index, pixmap)
+
+    streamed_items = set(dialog.thumbnail_scene.items())
+    dialog.on_digest_generated(dialog.video_path, pixmaps)
+
+    assert set(dialog.thumbnail_scene.items()) == streamed_items
+    pixmap_items = [item for item in streamed_items if isinstance(item, QGraphicsPixmapItem)]
+    assert len(pixmap_items) == 2
+
+
+def _cache_through_preview(qtbot, dialog):
+    """ダイアログと同じ設定のプレビューで動画を表示し、サムネイルを QPixmapCache に登録させる"""
+    preview = VideoThumbnailPreview(max_thumbnails=dialog.max_thumbnails, thumbnail_size=dialog.thumbnail_size)
+    qtbot.addWidget(preview)
+    preview.show()
+    if not preview.is_available:
+        pytest.skip("Video digest feature is disabled")
+    pixmaps = []
+    for _ in range(2):
+        pixmap = QPixmap(*dialog.thumbnail_size)
+        pixmap.fill()
+        pixmaps.append(pixmap)
+
+    def fake_start(self, video_path, token):
+        self._handle_digest(token, video_path, pixmaps)
+
+    preview._start_worker = types.MethodType(fake_start, preview)
+    preview.display_video(dialog.video_path)
+    qtbot.waitUntil(lambda: not preview._pending_timer.isActive())
+    return pixmaps
+
+
+def test_dialog_reuses_thumbnails_cached_by_preview(monkeypatch, qtbot, tmp_path):
+    generate_digest = VideoDigestDialog.generate_digest
+    dialog = _make_dialog(monkeypatch, qtbot, tmp_path)
+    pixmaps = _cache_through_preview(qtbot, dialog)
+
+    started = []
+    monkeypatch.setattr(video_digest_dialog, "VideoDigestWorker", lambda *args: started.append(args))
+    generate_digest(dialog)
+
+    # プレビューで生成済みなのでワーカーは起動しない
+    assert started == []
+    items = [item for item in dialog.thumbnail_scene.items() if isinstance(item, QGraphicsPixmapItem)]
+    assert sorted(item.pixmap().cacheKey() for item in items) == sorted(p.cacheKey() for p in pixmaps)
+    assert dialog.regenerate_button.isEnabled()
+    assert not dialog.progress_bar.isVisible()
+
+
+def test_dialog_starts_worker_when_cache_is_missing_or_regenerating(monkeypatch, qtbot, tmp_path):
+    generate_digest = VideoDigestDialog.generate_digest
+    dialog = _make_dialog(monkeypatch, qtbot, tmp_path)
+    _cache_through_preview(qtbot, dialog)
+
+    class FakeWorker:
+        def __init__(self, *args):
+            started.append(args)
+            self.digest_generated = self.thumbnail_ready = self.progress_updated = self
+            self.error_occurred = self.finished = self
+
+        def connect(self, slot):
+            pass
+
+        def start(self):
+            pass
+
+    started = []
+    monkeypatch.setattr(video_digest_dialog, "VideoDigestWorker", FakeWorker)
+
+    # 再生成はキャッシュがあってもデコードし直す
+    generate_digest(dialog, use_cache=False)
+    assert len(started) == 1
+
+    # キャッシュから破棄されていればワーカーを起動する
+    QPixmapCache.clear()
+    generate_digest(dialog)
+    assert len(started) == 2
@@ -1,12 +1,20 @@
-﻿import os
+﻿import hashlib
+import os
 import sys
+import threading
+import time
 from pathlib import Path
 
 import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from file_manager.video_duplicates import find_duplicate_videos
+from file_manager import video_duplicates
+from file_manager.video_duplicates import (
+    DuplicateGroup,
+    find_duplicate_videos,
+    find_duplicate_videos_with_features,
+)
 
 
 def test_find_duplicate_videos_detects_duplicates(tmp_path):
@@ -88,3 +96,302 @@ def test_find_duplicate_videos_keeps_symlink_paths(tmp_path):
     names = {Path(p).name for p in duplicates[0].files}
     assert names == {"base.mp4", "alias.mp4"}
 
+
+class FixedScoreFeatures:
+    """相手によらず決まった類似度を返す特徴量の代用品"""
+
+    duration = 10.0
+    average_color = (0.0, 0.0, 0.0)
+
+    def __init__(self, score: float) -> None:
+        self.score = score
+
+    def similarity_score(self, other) -> float:
+        return self.score
+
+
+def test_features_are_extracted_in_worker_threads(tmp_path):
+    for name in ("a.mp4", "b.mp4"):
+        (tmp_path / name).write_bytes(b"same-content")
+    (tmp_path / "single.mp4").write_bytes(b"unique-size-content")
+
+    called = {}
+
+    def features_callback(path):
+        called[os.path.basename(path)] = threading.current_thread()
+        return FixedScoreFeatures(1.0)
+
+    groups = find_duplicate_videos_with_features(
+        tmp_path, features_callback=features_callback, size_threshold_mb=0
+    )
+
+    # サイズが一意のファイルは比較されないため特徴量も抽出しない
+    assert set(called) == {"a.mp4", "b.mp4"}
+    assert all(thread is not threading.main_thread() for thread in called.values())
+    assert len(groups) == 1
+    assert all(isinstance(f, FixedScoreFeatures) for f in groups[0].features.values())
+
+
+def test_feature_extraction_can_stop(tmp_path):
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        (tmp_path / name).write_bytes(b"same-content")
+
+    stop = threading.Event()
+
+    def features_callback(path):
+        stop.set()
+        return None
+
+    progress = []
+    groups = find_duplicate_videos_with_features(
+        tmp_path,
+        features_callback=features_callback,
+        stop_callback=stop.is_set,
+        progress_callback=progress.append,
+        size_threshold_mb=0,
+    )
+
+    assert groups == []
+    assert progress[-1] == 100
+
+
+def test_feature_extraction_stop_skips_pending_workers(tmp_path):
+    file_count = (os.cpu_count() or 1) + 8
+    for index in range(file_count):
+        (tmp_path / f"file_{index}.mp4").write_bytes(b"same-content")
+
+    stop = threading.Event()
+    calls = []
+
+    def features_callback(path):
+        calls.append(path)
+        stop.set()
+        return None
+
+    find_duplicate_videos_with_features(
+        tmp_path, features_callback=features_callback, stop_callback=stop.is_set, size_threshold_mb=0
+    )
+
+    # 中断後に開始するはずだった抽出は実行されない
+    assert len(calls) <= (os.cpu_count() or 1)
+
+
+def test_feature_extraction_reports_progress(tmp_path):
+    for index in range(4):
+        (tmp_path / f"file_{index}.mp4").write_bytes(b"same-content")
+
+    progress = []
+    find_duplicate_videos_with_features(
+        tmp_path,
+        features_callback=lambda path: FixedScoreFeatures(1.0),
+        progress_callback=progress.append,
+        size_threshold_mb=0,
+    )
+
+    # 抽出の完了ごとに前半（0-50）の進捗が通知され、後半の比較へ単調に続く
+    assert [value for value in progress if 0 < value <= 50] == [12, 25, 37, 50]
+    assert progress == sorted(progress)
+    assert progress[-1] == 100
+
+
+def test_hash_file_matches_sha256_across_chunks(tmp_path):
+    target = tmp_path / "movie.mp4"
+    data = os.urandom(10_000)
+    target.write_bytes(data)
+
+    assert video_duplicates.hash_file(target, chunk_size=4096) == hashlib.sha256(data).hexdigest()
+
+
+def test_hash_file_without_file_digest_uses_chunk_loop(tmp_path, monkeypatch):
+    target = tmp_path / "movie.mp4"
+    data = os.urandom(10_000)
+    target.write_bytes(data)
+    monkeypatch.delattr(hashlib, "file_digest", raising=False)
+
+    assert video_duplicates.hash_file(target, chunk_size=4096) == hashlib.sha256(data).hexdigest()
+
+
+def test_fingerprint_equals_full_hash_for_small_files(tmp_path):
+    target = tmp_path / "small.mp4"
+    target.write_bytes(b"small-video")
+
+    assert video_duplicates.fingerprint_file(target) == video_duplicates.hash_file(target)
+
+
+def test_full_hash_only_for_matching_head_and_tail(tmp_path, monkeypatch):
+    edge = video_duplicates.FINGERPRINT_EDGE
+    body = os.urandom(edge * 3)
+    (tmp_path / "a.mp4").write_bytes(body)
+    (tmp_path / "b.mp4").write_bytes(body)
+    # 先頭と末尾は同じで中央だけ異なるファイル
+    (tmp_path / "c.mp4").write_bytes(body[:edge] + bytes(edge) + body[-edge:])
+    # 同じサイズだが先頭が異なるファイル
+    (tmp_path / "d.mp4").write_bytes(b"x" + body[1:])
+
+    hashed = []
+    original_hash_file = video_duplicates.hash_file
+
+    def counting_hash_file(path, *args, **kwargs):
+        hashed.append(os.path.basename(path))
+        return original_hash_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(video_duplicates, "hash_file", counting_hash_file)
+
+    duplicates = find_duplicate_videos(tmp_path)
+
+    assert sorted(hashed) == ["a.mp4", "b.mp4", "c.mp4"]
+    assert len(duplicates) == 1
+    assert {Path(p).name for p in duplicates[0].files} == {"a.mp4", "b.mp4"}
+
+
+def test_walk_videos_filters_extensions_and_respects_recursion(tmp_path):
+    (tmp_path / "top.MP4").write_bytes(b"12345")
+    (tmp_path / "notes.txt").write_bytes(b"text")
+    nested = tmp_path / "nested"
+    nested.mkdir()
+    (nested / "inner.mkv").write_bytes(b"123")
+
+    exts = frozenset({".mp4", ".mkv"})
+
+    found = {os.path.basename(p): size for p, size in video_duplicates._walk_videos(tmp_path, exts)}
+    assert found == {"top.MP4": 5, "inner.mkv": 3}
+
+    shallow = {os.path.basename(p) for p, _ in video_duplicates._walk_videos(tmp_path, exts, recursive=False)}
+    assert shallow == {"top.MP4"}
+
+
+def test_is_video_file_accepts_precomputed_extension_set(tmp_path):
+    video = tmp_path / "clip.MOV"
+    video.write_bytes(b"data")
+    exts = video_duplicates._extension_set([".MOV"])
+
+    assert exts == frozenset({".mov"})
+    assert video_duplicates.is_video_file(video, exts)
+    assert video_duplicates.is_video_file(video)
+    assert not video_duplicates.is_video_file(tmp_path / "missing.mov", exts)
+    assert not video_duplicates.is_video_file(video, frozenset({".mp4"}))
+
+
+def test_duplicate_group_keeps_files_sorted():
+    group = DuplicateGroup(1, "hash", ["d.mp4", "c.mp4"])
+    assert group.files == ["c.mp4", "d.mp4"]
+
+    group.add_file_with_features("a.mp4", None)
+    group.add_file_with_features("c.mp4", None)
+    group.add_file_with_features("b.mp4", None)
+
+    assert group.files == ["a.mp4", "b.mp4", "c.mp4", "d.mp4"]
+
+
+class PairFeatures:
+    """相手ごとに決まった類似度を返す特徴量の代用品"""
+
+    def __init__(self, name: str, scores: dict, duration: float = 10.0, average_color=(0.0, 0.0, 0.0)) -> None:
+        self.name = name
+        self.scores = scores
+        self.duration = duration
+        self.average_color = average_color
+
+    def similarity_score(self, other) -> float:
+        return self.scores.get(frozenset((self.name, other.name)), 0.0)
+
+
+def test_merge_similar_groups_joins_connected_components():
+    scores = {frozenset(("a", "c")): 0.99, frozenset(("b", "c")): 0.99}
+    groups = []
+    for name in ("a", "b", "c", "d"):
+        features = PairFeatures(name, scores)
+        groups.append(DuplicateGroup(100, name, [f"{name}.mp4"], features={f"{name}.mp4": features}))
+
+    merged = video_duplicates._merge_similar_groups(groups, 0.95)
+
+    # a と b は直接似ていなくても c を介して同じグループになる
+    assert [sorted(g.files) for g in merged] == [["a.mp4", "b.mp4", "c.mp4"], ["d.mp4"]]
+    assert merged[0] is groups[0]
+
+
+def test_find_duplicate_videos_reports_each_progress_value_once(tmp_path):
+    for index in range(300):
+        (tmp_path / f"file_{index}.mp4").write_bytes(b"same")
+
+    progress_values = []
+    find_duplicate_videos(tmp_path, progress_callback=progress_values.append)
+
+    assert len(progress_values) == len(set(progress_values))
+    assert progress_values[-1] == 100
+
+
+def test_hash_in_parallel_keeps_order_and_reports_unreadable_files(tmp_path):
+    targets = []
+    for index in range(5):
+        path = tmp_path / f"file_{index}.mp4"
+        path.write_bytes(bytes([index]) * 10)
+        targets.append((path, video_duplicates.fingerprint_file(path)))
+
+    results = list(video_duplicates._hash_in_parallel(targets, 10, batch_size=2))
+    assert results == targets
+
+    missing = tmp_path / "missing.mp4"
+    big_size = video_duplicates.FINGERPRINT_EDGE * 4
+
+    # 指紋が全体を覆わないサイズでは実際に読み込み、失敗は None になる
+    assert list(video_duplicates._hash_in_parallel([(missing, "unused")], big_size)) == [(missing, None)]
+
+
+def test_hash_in_parallel_close_does_not_wait_for_running_hashes(monkeypatch):
+    release = threading.Event()
+
+    def slow_hash(path, size, fingerprint):
+        if path != "first":
+            release.wait(5)
+        return fingerprint
+
+    monkeypatch.setattr(video_duplicates, "_content_hash", slow_hash)
+    results = video_duplicates._hash_in_parallel([("first", "f")] + [(f"p{i}", "x") for i in range(4)], 10)
+    assert next(results) == ("first", "f")
+
+    # 呼び出し側が反復をやめたら、実行中のハッシュ計算を待たずに戻る
+    start = time.monotonic()
+    results.close()
+    elapsed = time.monotonic() - start
+    release.set()
+
+    assert elapsed < 1.0
+
+
+def test_merge_skips_frame_comparison_for_different_duration_or_color():
+    compared = []
+
+    class RecordingFeatures(PairFeatures):
+        def similarity_score(self, other) -> float:
+            compared.append((self.name, other.name))
+            return 1.0
+
+    base = RecordingFeatures("base", {})
+    longer = RecordingFeatures("longer", {}, duration=20.0)
+    brighter = RecordingFeatures("brighter", {}, average_color=(200.0, 200.0, 200.0))
+    groups = [
+        DuplicateGroup(100, f.name, [f"{f.name}.mp4"], features={f"{f.name}.mp4": f})
+        for f in (base, longer, brighter)
+    ]
+
+    merged = video_duplicates._merge_similar_groups(groups, 0.95)
+
+    assert compared == []
+    assert len(merged) == 3
+
+
+def test_is_similar_checks_newest_members_first_and_skips_other_lengths():
+    compared = []
+
+    class RecordingFeatures(PairFeatures):
+        def similarity_score(self, other) -> float:
+            compared.append(other.name)
+            return 1.0 if other.name == "newest" else 0.0
+
+    group = DuplicateGroup(100, "hash", [], features={})
+    for name, duration in (("oldest", 10.0), ("other_length", 30.0), ("newest", 10.0)):
+        group.add_file_with_features(f"{name}.mp4", RecordingFeatures(name, {}, duration=duration))
+
+    assert group.is_similar("candidate.mp4", RecordingFeatures("candidate", {}))
+    assert compared == ["newest"]
@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+from PySide6.QtCore import Qt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from file_manager.video_duplicates import DuplicateGroup
+from file_manager.video_duplicates_dialog import VideoDuplicatesDialog
+
+pytestmark = pytest.mark.qt_serial
+
+
+def _make_dialog(monkeypatch, qtbot, tmp_path):
+    # ワーカーを起動せずにダイアログだけを作成する
+    monkeypatch.setattr(VideoDuplicatesDialog, "_start_worker", lambda self: None)
+    dialog = VideoDuplicatesDialog(str(tmp_path))
+    qtbot.addWidget(dialog)
+    return dialog
+
+
+def test_populate_tree_builds_groups_with_relative_paths(monkeypatch, qtbot, tmp_path):
+    dialog = _make_dialog(monkeypatch, qtbot, tmp_path)
+    groups = [
+        DuplicateGroup(10, "aaa", [str(tmp_path / "a.mp4"), str(tmp_path / "sub" / "b.mp4")]),
+        DuplicateGroup(20, "bbb", [str(tmp_path / "c.mp4"), "/elsewhere/d.mp4"]),
+    ]
+
+    dialog._populate_tree(groups)
+
+    assert dialog.tree.topLevelItemCount() == 2
+    first = dialog.tree.topLevelItem(0)
+    assert first.isExpanded()
+    assert first.isFirstColumnSpanned()
+    assert [first.child(i).text(0) for i in range(first.childCount())] == ["a.mp4", os.path.join("sub", "b.mp4")]
+    second = dialog.tree.topLevelItem(1)
+    # グループ内のパスはソート済みなので、基準フォルダ外の絶対パスが先に来る
+    assert second.child(0).text(0) == "/elsewhere/d.mp4"
+    assert second.child(1).data(0, Qt.UserRole) == str(tmp_path / "c.mp4")
+    assert dialog.tree.updatesEnabled()
+    assert not dialog.tree.signalsBlocked()
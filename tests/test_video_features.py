@@ -0,0 +1,266 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from file_manager import video_features as vf
+
+
+class FakeCapture:
+    """grab/retrieve/set の呼び出しを記録するVideoCaptureの代用品"""
+
+    def __init__(self, frame_count: int) -> None:
+        self.frame_count = frame_count
+        self.position = 0
+        self.seeks = []
+        self.grabs = 0
+        self.retrieves = 0
+
+    def set(self, prop, value):
+        assert prop == vf.cv2.CAP_PROP_POS_FRAMES
+        self.seeks.append(int(value))
+        self.position = int(value)
+        return True
+
+    def grab(self):
+        if self.position >= self.frame_count:
+            return False
+        self.position += 1
+        self.grabs += 1
+        return True
+
+    def retrieve(self, image=None):
+        self.retrieves += 1
+        if image is None:
+            image = np.empty((2, 2, 3), dtype=np.int32)
+        image[...] = self.position - 1
+        return True, image
+
+
+def test_read_frames_at_grabs_short_gaps_and_seeks_long_ones():
+    cap = FakeCapture(frame_count=1000)
+
+    frames = list(vf.read_frames_at(cap, [10, 20, 500], max_grab_gap=16))
+
+    assert [i for i, _ in frames] == [0, 1, 2]
+    assert [int(frame[0, 0, 0]) for _, frame in frames] == [10, 20, 500]
+    assert cap.seeks == [10, 500]
+    assert cap.retrieves == 3
+
+
+def test_read_frames_at_yields_none_past_the_end():
+    cap = FakeCapture(frame_count=15)
+
+    frames = list(vf.read_frames_at(cap, [5, 14, 20]))
+
+    assert frames[0][1] is not None
+    assert frames[1][1] is not None
+    assert frames[2] == (2, None)
+
+
+def test_read_frames_at_reads_in_frame_order_but_keeps_indices():
+    cap = FakeCapture(frame_count=1000)
+
+    frames = list(vf.read_frames_at(cap, [500, 10, 20], max_grab_gap=16))
+
+    assert [i for i, _ in frames] == [1, 2, 0]
+    assert [int(frame[0, 0, 0]) for _, frame in frames] == [10, 20, 500]
+    assert cap.seeks == [10, 500]
+
+
+def test_frame_indices_for_scales_positions():
+    indices = vf.frame_indices_for([0.25, 0.5, 0.999], 100)
+
+    assert indices.tolist() == [25, 50, 99]
+
+
+def test_thumbnail_positions_for_matches_evenly_spaced_steps():
+    step = 1.0 / 7
+    assert vf.thumbnail_positions_for(6).tolist() == [step * (i + 1) for i in range(6)]
+    assert vf.thumbnail_positions_for(1).tolist() == [0.5]
+
+
+def _make_features(rng, positions, duration=10.0):
+    return vf.VideoFeatures(
+        path="dummy.mp4",
+        thumbnail_positions=list(positions),
+        frame_histograms=[rng.random(64).astype(np.float32) / 32 for _ in positions],
+        frame_features=[rng.standard_normal(128).astype(np.float32) for _ in positions],
+        average_color=np.zeros(3, dtype=np.float32),
+        duration=duration,
+        resolution=(640, 360),
+        fps=30.0,
+        file_size=1000,
+    )
+
+
+def _reference_score(a, b):
+    """ベクトル化前のループ実装と同じ計算"""
+    duration_sim = max(0.0, 1.0 - abs(a.duration - b.duration) / max(a.duration, b.duration, 1.0))
+    if duration_sim < 0.9:
+        return 0.0
+    (w1, h1), (w2, h2) = a.resolution, b.resolution
+    resolution_sim = (min(w1, w2) * min(h1, h2)) / (max(w1, w2) * max(h1, h2))
+
+    def best_mean(items1, items2, sim):
+        bests = []
+        for i, x in enumerate(items1):
+            best = 0.0
+            for j, y in enumerate(items2):
+                if abs(a.thumbnail_positions[i] - b.thumbnail_positions[j]) > 0.1:
+                    continue
+                best = max(best, sim(x, y))
+            if best > 0:
+                bests.append(best)
+        return np.mean(bests) if bests else 0.0
+
+    histogram_sim = best_mean(a.frame_histograms, b.frame_histograms, lambda x, y: np.minimum(x, y).sum())
+    feature_sim = best_mean(
+        a.frame_features,
+        b.frame_features,
+        lambda x, y: np.dot(x, y) / (np.linalg.norm(x) * np.linalg.norm(y)),
+    )
+    return 0.1 * duration_sim + 0.1 * resolution_sim + 0.4 * histogram_sim + 0.4 * feature_sim
+
+
+def test_similarity_score_matches_pairwise_loop():
+    rng = np.random.default_rng(0)
+    a = _make_features(rng, [1 / 7 * (i + 1) for i in range(6)])
+    b = _make_features(rng, [0.2, 0.25, 0.5, 0.8], duration=10.5)
+
+    assert np.isclose(a.similarity_score(b), _reference_score(a, b), atol=2e-3)
+    assert np.isclose(b.similarity_score(a), _reference_score(b, a), atol=2e-3)
+    assert np.isclose(a.similarity_score(a), _reference_score(a, a), atol=2e-3)
+
+
+def test_similarity_score_handles_features_without_frames():
+    rng = np.random.default_rng(1)
+    a = _make_features(rng, [0.5])
+    empty = _make_features(rng, [])
+
+    # ヒストグラム・特徴量の項が0になり、長さと解像度だけが残る
+    assert np.isclose(a.similarity_score(empty), 0.2)
+    assert np.isclose(empty.similarity_score(a), 0.2)
+
+
+def test_normalize_feature_rows_returns_unit_vectors_and_keeps_zero_rows():
+    rows = np.array([[3.0, 4.0], [0.0, 0.0]], dtype=np.float32)
+
+    normalized = vf.normalize_feature_rows(rows)
+
+    assert np.allclose(normalized, [[0.6, 0.8], [0.0, 0.0]])
+    assert np.allclose(vf.normalize_feature_rows(rows[0]), [0.6, 0.8])
+
+
+def test_prenormalized_features_score_like_raw_features():
+    rng = np.random.default_rng(2)
+    raw = _make_features(rng, [0.25, 0.5, 0.75])
+    prenormalized = vf.VideoFeatures(
+        path=raw.path,
+        thumbnail_positions=raw.thumbnail_positions,
+        frame_histograms=raw.frame_histograms,
+        frame_features=[vf.normalize_feature_rows(f) for f in raw.frame_features],
+        average_color=raw.average_color,
+        duration=raw.duration,
+        resolution=raw.resolution,
+        fps=raw.fps,
+        file_size=raw.file_size,
+        features_normalized=True,
+    )
+
+    assert np.isclose(prenormalized.similarity_score(raw), raw.similarity_score(raw))
+
+
+def test_compute_frame_features_matches_reference_layout():
+    rng = np.random.default_rng(3)
+    frame = rng.integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+    cv2 = vf.cv2
+
+    hist, features = vf.compute_frame_features(frame)
+
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    expected_hist = cv2.calcHist([hsv], [0, 1], None, [8, 8], [0, 180, 0, 256])
+    expected_hist = cv2.normalize(expected_hist, expected_hist).flatten()
+    edges = cv2.Canny(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), 100, 200)
+    expected_features = np.concatenate([
+        cv2.resize(edges, (8, 8)).flatten() / 255.0,
+        cv2.resize(frame, (8, 8)).reshape(-1) / 255.0,
+    ])
+
+    assert hist.dtype == np.float32 and features.dtype == np.float32
+    assert features.shape == (vf.FRAME_FEATURE_SIZE,)
+    assert np.allclose(hist, expected_hist)
+    assert np.allclose(features, expected_features)
+
+
+def test_video_features_stacks_list_inputs_into_matrices():
+    rng = np.random.default_rng(4)
+    features = _make_features(rng, [0.25, 0.75])
+    empty = _make_features(rng, [])
+
+    assert features.frame_histograms.shape == (2, 64)
+    assert features.frame_features.shape == (2, 128)
+    assert features.frame_histograms.dtype == np.float32
+    assert empty.frame_histograms.shape[0] == 0
+
+
+def test_quantize_features_keeps_cosine_similarity_close():
+    rng = np.random.default_rng(5)
+    vectors = vf.normalize_feature_rows(rng.random((4, vf.FRAME_FEATURE_SIZE)).astype(np.float32))
+
+    quantized, scales = vf.quantize_features(vectors)
+
+    assert quantized.dtype == np.int8
+    assert np.abs(quantized).max() == vf.FEATURE_QUANT_LEVEL
+    approx = (quantized.astype(np.int32) @ quantized.T.astype(np.int32)) * np.outer(scales, scales)
+    assert np.allclose(approx, vectors @ vectors.T, atol=2e-3)
+
+
+def test_similarity_score_ignores_frames_at_distant_positions():
+    rng = np.random.default_rng(6)
+    early = _make_features(rng, [0.1, 0.2])
+    late = _make_features(rng, [0.8, 0.9])
+
+    # 比較できるフレームの組がないため、長さと解像度の項だけになる
+    assert np.isclose(early.similarity_score(late), 0.2)
+    assert np.isclose(early.similarity_score(late), _reference_score(early, late))
+
+
+def test_masked_min_sums_only_fills_masked_pairs():
+    rng = np.random.default_rng(7)
+    hist1 = rng.random((3, 8)).astype(np.float32)
+    hist2 = rng.random((4, 8)).astype(np.float32)
+    mask = np.array([[True, False, False, True], [False, True, False, False], [False, False, False, False]])
+
+    sims = vf._masked_min_sums(hist1, hist2, mask)
+
+    full = np.minimum(hist1[:, None, :], hist2[None, :, :]).sum(axis=-1)
+    assert np.allclose(sims[mask], full[mask])
+    assert not sims[~mask].any()
+
+
+def test_read_frames_at_can_decode_into_one_buffer():
+    cap = FakeCapture(frame_count=100)
+
+    frames = [(i, frame, int(frame[0, 0, 0])) for i, frame in vf.read_frames_at(cap, [10, 20, 30], reuse_buffer=True)]
+
+    assert [value for _, _, value in frames] == [10, 20, 30]
+    assert frames[0][1] is frames[1][1] is frames[2][1]
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="posix_fadvise is not available")
+def test_prefetch_small_file_only_advises_small_files(monkeypatch, tmp_path):
+    calls = []
+    monkeypatch.setattr(vf.os, "posix_fadvise", lambda fd, offset, length, advice: calls.append(advice))
+    video_file = tmp_path / "small.mp4"
+    video_file.write_bytes(b"x" * 1024)
+
+    assert vf.prefetch_small_file(str(video_file))
+    assert calls == [os.POSIX_FADV_WILLNEED]
+
+    assert not vf.prefetch_small_file(str(video_file), limit=512)
+    assert not vf.prefetch_small_file(str(tmp_path / "missing.mp4"))
+    assert len(calls) == 1
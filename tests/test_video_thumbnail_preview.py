@@ -4,86 +4,301 @@ import types
 from pathlib import Path
 
 import pytest
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QImage, QPixmap, QPixmapCache
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
-from file_manager.video_thumbnail_preview import VideoThumbnailPreview
+from file_manager.video_thumbnail_preview import VideoThumbnailPreview, thumbnail_cache_key
 
+pytestmark = pytest.mark.qt_serial
 
-def test_thumbnail_preview_shows_placeholder(qtbot):
-    preview = VideoThumbnailPreview()
-    qtbot.addWidget(preview)
 
-    preview.display_video(None)
+@pytest.fixture
+def make_preview(qtbot):
+    """プレビューを作成して表示する（ダイジェスト機能が無効ならスキップ）"""
 
-    assert not preview._thumbnail_labels
+    def make(show=True, **kwargs):
+        preview = VideoThumbnailPreview(**kwargs)
+        qtbot.addWidget(preview)
+        if show:
+            preview.show()
+        if not preview.is_available:
+            pytest.skip("Video digest feature is disabled")
+        return preview
 
+    return make
 
-def test_thumbnail_preview_generates_thumbnails(monkeypatch, qtbot, tmp_path):
-    preview = VideoThumbnailPreview()
-    qtbot.addWidget(preview)
 
-    if not preview.is_available:
-        pytest.skip("Video digest feature is disabled")
+@pytest.fixture
+def fake_worker(monkeypatch):
+    """_start_worker を差し替え、開始要求の (パス, トークン) を記録するリストを返す
+
+    pixmaps を渡すと、ワーカーを起動せずに進捗50%とその結果を即座に返します。
+    """
+
+    def install(preview, pixmaps=None):
+        started = []
+
+        def fake_start(self, video_path, token):
+            started.append((video_path, token))
+            if pixmaps is not None:
+                self._handle_progress(token, 50)
+                self._handle_digest(token, video_path, list(pixmaps))
+
+        monkeypatch.setattr(preview, "_start_worker", types.MethodType(fake_start, preview))
+        return started
+
+    return install
 
-    recorded: dict[str, str] = {}
 
-    def fake_start(self, video_path, token):
-        recorded["path"] = video_path
-        pixmap = QPixmap(20, 10)
-        pixmap.fill()
-        self._handle_progress(token, 50)
-        self._handle_digest(token, video_path, [pixmap])
-        self._handle_finished(token)
+def _white_pixmap(width=16, height=16):
+    pixmap = QPixmap(width, height)
+    pixmap.fill()
+    return pixmap
 
-    monkeypatch.setattr(
-        preview,
-        "_start_worker",
-        types.MethodType(fake_start, preview),
-    )
 
-    video_file = tmp_path / "sample.mp4"
+def _fake_video(tmp_path, name):
+    video_file = tmp_path / name
     video_file.write_bytes(b"fake")
+    return video_file
 
-    preview.display_video(str(video_file))
 
-    assert Path(recorded["path"]).resolve() == video_file.resolve()
-    assert preview._thumbnail_labels
-    assert preview._thumbnail_labels[0].pixmap() is not None
+def _display(qtbot, preview, path):
+    """選択を確定させ、遅延起動されるワーカーの開始まで待つ"""
+    preview.display_video(path)
+    qtbot.waitUntil(lambda: not preview._pending_timer.isActive())
 
 
-def test_set_preferences_restarts_current_video(monkeypatch, qtbot, tmp_path):
+def _visible_labels(preview):
+    return [label for label in preview._thumbnail_labels if not label.isHidden()]
+
+
+def test_thumbnail_preview_shows_placeholder(qtbot):
     preview = VideoThumbnailPreview()
     qtbot.addWidget(preview)
+    preview.show()
 
-    if not preview.is_available:
-        pytest.skip("Video digest feature is disabled")
+    preview.display_video(None)
 
-    calls = {"count": 0}
+    assert not _visible_labels(preview)
 
-    def fake_start(self, video_path, token):
-        calls["count"] += 1
-        pixmap = QPixmap(16, 16)
-        pixmap.fill()
-        self._handle_digest(token, video_path, [pixmap])
-        self._handle_finished(token)
 
-    monkeypatch.setattr(
-        preview,
-        "_start_worker",
-        types.MethodType(fake_start, preview),
-    )
+def test_thumbnail_preview_generates_thumbnails(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview()
+    started = fake_worker(preview, [_white_pixmap(20, 10)])
+    video_file = _fake_video(tmp_path, "sample.mp4")
 
-    video_file = tmp_path / "pref_sample.mp4"
-    video_file.write_bytes(b"fake")
+    _display(qtbot, preview, str(video_file))
+
+    assert Path(started[0][0]).resolve() == video_file.resolve()
+    assert len(_visible_labels(preview)) == 1
+    assert not preview._thumbnail_labels[0].pixmap().isNull()
 
-    preview.display_video(str(video_file))
-    assert calls["count"] == 1
 
-    calls["count"] = 0
+def test_set_preferences_restarts_current_video(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview()
+    started = fake_worker(preview, [_white_pixmap()])
+    video_file = _fake_video(tmp_path, "pref_sample.mp4")
+
+    _display(qtbot, preview, str(video_file))
+    assert len(started) == 1
+
+    started.clear()
     preview.set_preferences(max_thumbnails=preview._max_thumbnails + 1)
+    qtbot.waitUntil(lambda: not preview._pending_timer.isActive())
 
-    assert calls["count"] == 1
+    assert len(started) == 1
     assert preview._max_thumbnails >= 2
 
+
+def test_reselecting_video_uses_cached_pixmaps(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview()
+    started = fake_worker(preview, [_white_pixmap()] * 2)
+    first = _fake_video(tmp_path, "first.mp4")
+    second = _fake_video(tmp_path, "second.mp4")
+
+    _display(qtbot, preview, str(first))
+    _display(qtbot, preview, str(second))
+    _display(qtbot, preview, str(first))
+
+    assert len(started) == 2
+    assert len(_visible_labels(preview)) == 2
+
+    # ファイルが更新されたらキャッシュは使わない
+    stat = first.stat()
+    os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    _display(qtbot, preview, str(second))
+    _display(qtbot, preview, str(first))
+
+    assert len(started) == 3
+
+
+def test_thumbnail_labels_are_reused(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview(max_thumbnails=3)
+    fake_worker(preview, [_white_pixmap()] * 2)
+
+    pool = [label for labels in preview._page_labels for label in labels]
+    assert len(pool) == 6
+
+    for name in ("a.mp4", "b.mp4"):
+        _display(qtbot, preview, str(_fake_video(tmp_path, name)))
+        assert [label for labels in preview._page_labels for label in labels] == pool
+        assert len(_visible_labels(preview)) == 2
+
+    preview.set_preferences(max_thumbnails=4)
+
+    assert len(preview._thumbnail_labels) == 4
+
+
+def test_thumbnails_are_upgraded_to_smooth_scaling(make_preview, fake_worker, monkeypatch, qtbot, tmp_path):
+    preview = make_preview(thumbnail_size=(16, 8))
+
+    modes = []
+    original_scale = VideoThumbnailPreview._scale
+
+    def recording_scale(self, pixmap, mode):
+        modes.append(mode)
+        return original_scale(self, pixmap, mode)
+
+    monkeypatch.setattr(VideoThumbnailPreview, "_scale", recording_scale)
+    fake_worker(preview, [_white_pixmap(32, 16)])
+
+    _display(qtbot, preview, str(_fake_video(tmp_path, "smooth.mp4")))
+
+    qtbot.waitUntil(lambda: len(modes) == 2)
+    assert modes == [Qt.FastTransformation, Qt.SmoothTransformation]
+    cache_key = next(iter(preview._pixmap_cache))
+    cached = QPixmapCache.find(thumbnail_cache_key(cache_key, 0, 1))
+    assert preview._thumbnail_labels[0].pixmap().cacheKey() == cached.cacheKey()
+
+
+def test_evicted_pixmaps_regenerate_thumbnails(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview()
+    started = fake_worker(preview, [_white_pixmap()])
+    first = _fake_video(tmp_path, "evict_a.mp4")
+    second = _fake_video(tmp_path, "evict_b.mp4")
+
+    _display(qtbot, preview, str(first))
+    QPixmapCache.clear()
+    _display(qtbot, preview, str(second))
+    _display(qtbot, preview, str(first))
+
+    assert len(started) == 3
+
+
+def test_rapid_selection_launches_only_last_worker(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview()
+    started = fake_worker(preview)
+
+    for name in ("one.mp4", "two.mp4", "three.mp4"):
+        preview.display_video(str(_fake_video(tmp_path, name)))
+
+    assert started == []
+    qtbot.waitUntil(lambda: [Path(path).name for path, _ in started] == ["three.mp4"])
+
+
+def test_start_worker_runs_digest_on_thread_pool(make_preview, monkeypatch, qtbot, tmp_path):
+    preview = make_preview()
+
+    import file_manager.video_digest as vd
+
+    def fake_generate(self, video_path, max_thumbnails=6, thumbnail_size=(160, 90)):
+        image = QImage(32, 16, QImage.Format_RGB888)
+        image.fill(0)
+        self.digest_generated.emit(video_path, [image])
+
+    monkeypatch.setattr(vd.VideoDigestGenerator, "generate_digest", fake_generate)
+
+    _display(qtbot, preview, str(_fake_video(tmp_path, "pooled.mp4")))
+
+    qtbot.waitUntil(lambda: len(_visible_labels(preview)) == 1)
+    assert preview._pool.waitForDone(1000)
+
+
+def test_final_size_thumbnails_are_not_rescaled(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview(thumbnail_size=(32, 16))
+    pixmap = _white_pixmap(32, 16)
+    fake_worker(preview, [pixmap])
+
+    _display(qtbot, preview, str(_fake_video(tmp_path, "final.mp4")))
+
+    assert preview._thumbnail_labels[0].pixmap().cacheKey() == pixmap.cacheKey()
+
+
+def test_new_thumbnails_swap_in_as_one_page(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview(max_thumbnails=3)
+    fake_worker(preview, [_white_pixmap()] * 3)
+
+    _display(qtbot, preview, str(_fake_video(tmp_path, "page.mp4")))
+
+    shown = preview._thumb_stack.currentIndex()
+    hidden = 1 - shown
+    assert len(_visible_labels(preview)) == 3
+    assert all(label.pixmap().isNull() for label in preview._page_labels[hidden])
+
+    preview.display_video(None)
+
+    assert preview._thumb_stack.currentIndex() == hidden
+    assert not _visible_labels(preview)
+
+
+def test_is_video_result_is_reused_until_file_changes(make_preview, monkeypatch, tmp_path):
+    preview = make_preview()
+
+    checked = []
+    original = preview._digest_helper.is_video_file
+
+    def counting_is_video_file(path):
+        checked.append(path)
+        return original(path)
+
+    monkeypatch.setattr(preview._digest_helper, "is_video_file", counting_is_video_file)
+
+    text_file = tmp_path / "notes.txt"
+    text_file.write_text("not a video")
+
+    preview.display_video(str(text_file))
+    preview.display_video(None)
+    preview.display_video(str(text_file))
+
+    assert len(checked) == 1
+    assert "動画ファイルではありません" in preview._status_label.text()
+
+    stat = text_file.stat()
+    os.utime(text_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    preview.display_video(None)
+    preview.display_video(str(text_file))
+
+    assert len(checked) == 2
+
+
+def test_thumbnails_are_shown_as_they_stream_in(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview(max_thumbnails=3)
+    started = fake_worker(preview)
+
+    _display(qtbot, preview, str(_fake_video(tmp_path, "stream.mp4")))
+    video_path, token = started[0]
+
+    image = QImage(16, 16, QImage.Format_RGB888)
+    image.fill(0)
+    preview._handle_thumbnail(token, video_path, 1, image)
+
+    visible = _visible_labels(preview)
+    assert visible == [preview._thumbnail_labels[1]]
+
+    # 古い要求のサムネイルは無視する
+    preview._handle_thumbnail(token - 1, video_path, 0, image)
+    assert _visible_labels(preview) == visible
+
+
+def test_hidden_preview_defers_worker_until_shown(make_preview, fake_worker, qtbot, tmp_path):
+    preview = make_preview(show=False)
+    started = fake_worker(preview)
+
+    _display(qtbot, preview, str(_fake_video(tmp_path, "hidden.mp4")))
+
+    assert started == []
+
+    preview.show()
+    qtbot.waitUntil(lambda: [Path(path).name for path, _ in started] == ["hidden.mp4"])